@@ -5,8 +5,17 @@ import threading
 from datetime import timedelta
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
+from tkinter import PhotoImage, filedialog, messagebox
+from extractor import (DEFAULT_DEDUP_DISTANCE, DEFAULT_PREVIEW_FPS, ENCODER_PRESETS, INTERPOLATIONS, OUTPUT_FORMATS,
+                       OUTPUT_MODES, SCENE_METRICS, CameraDiscovery, ExtractionSettings, FrameExtractor, PPMEncoder,
+                       PreviewDecoder, UpdateBus, available_decoders, count_frames, default_worker_count, fit_size,
+                       frame_count_estimated, probe_video)
+
+# How often the camera dialog checks for newly discovered cameras
+CAMERA_POLL_MS = 50
+
+# How often worker progress is applied to the widgets (about 15 Hz)
+UI_UPDATE_MS = 66
 
 class VideoToImageApp:
     def __init__(self, root):
@@ -24,22 +33,56 @@ class VideoToImageApp:
         self.output_folder = None
         self.interval = ttk.DoubleVar(value=1.0)
         self.frame_count = ttk.IntVar(value=10)
+        self.scene_metric = ttk.StringVar(value="histogram")
+        self.scene_threshold = ttk.DoubleVar(value=SCENE_METRICS["histogram"])
         self.output_format = ttk.StringVar(value="jpg")
+        self.encoder_preset = ttk.StringVar(value="balanced")
+        self.output_mode = ttk.StringVar(value="frames")
+        self.sheet_columns = ttk.IntVar(value=5)
+        self.sheet_rows = ttk.IntVar(value=5)
+        self.sheet_tile_width = ttk.IntVar(value=320)
+        self.sheet_timestamps = ttk.BooleanVar(value=True)
+        self.writer_threads = ttk.IntVar(value=default_worker_count())
+        self.decode_processes = ttk.IntVar(value=1)
+        self.decoder = ttk.StringVar(value="opencv")
+        self.decoder_threads = ttk.IntVar(value=0)
+        self.instrument = ttk.BooleanVar(value=False)
+        self.dedup = ttk.BooleanVar(value=False)
+        self.dedup_distance = ttk.IntVar(value=DEFAULT_DEDUP_DISTANCE)
+        self.sharpest = ttk.IntVar(value=1)
+        self.resize_width = ttk.IntVar(value=0)
+        self.resize_height = ttk.IntVar(value=0)
+        self.interpolation = ttk.StringVar(value="area")
+        self.letterbox = ttk.BooleanVar(value=False)
+        self.grayscale = ttk.BooleanVar(value=False)
         self.extraction_method = ttk.StringVar(value="interval")
         self.is_camera = False
         self.camera_idx = None
+        self.camera_discovery = CameraDiscovery()
         self.preview_running = False
-        self.preview_thread = None
-        self.cap = None
+        self.preview_decoder = None
+        self.preview_generation = 0
+        self.preview_job = None
+        self.preview_due = 0.0
+        self.preview_size = (640, 360)
+        self.preview_photo = None
+        self.preview_item = None
+        self.preview_center = None
         self.total_frames = 0
         self.progress_value = ttk.DoubleVar(value=0)
         self.status_text = ttk.StringVar(value="Ready")
         
+        # Extraction threads report through the bus; the Tk thread applies it at UI_UPDATE_MS
+        self.updates = UpdateBus()
+        self.extraction_thread = None
+        
         # Create main frames
         self.create_widgets()
         
         # Bind closing event
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.root.after(UI_UPDATE_MS, self.pump_updates)
     
     def create_widgets(self):
         # Create a notebook with tabs
@@ -118,6 +161,10 @@ class VideoToImageApp:
         output_frame.columnconfigure(0, weight=2)
         output_frame.columnconfigure(1, weight=1)
         output_frame.columnconfigure(2, weight=1)
+        output_frame.columnconfigure(3, weight=1)
+        output_frame.columnconfigure(4, weight=1)
+        output_frame.columnconfigure(5, weight=1)
+        output_frame.columnconfigure(6, weight=1)
         
         # Output Settings with more compact layout
         output_button = ttk.Button(
@@ -134,14 +181,156 @@ class VideoToImageApp:
         format_combo = ttk.Combobox(
             output_frame, 
             textvariable=self.output_format,
-            values=["jpg", "png"],
+            values=list(OUTPUT_FORMATS),
             width=4,
             state="readonly"
         )
         format_combo.grid(row=0, column=2, padx=2, pady=2, sticky="w")
         
+        # Number of threads encoding and writing images
+        writers_label = ttk.Label(output_frame, text="Writers:")
+        writers_label.grid(row=0, column=3, padx=2, pady=2, sticky="e")
+        
+        writers_spin = ttk.Spinbox(
+            output_frame,
+            from_=1,
+            to=64,
+            increment=1,
+            textvariable=self.writer_threads,
+            width=3
+        )
+        writers_spin.grid(row=0, column=4, padx=2, pady=2, sticky="w")
+        
+        # Encoder speed/size trade-off
+        preset_label = ttk.Label(output_frame, text="Preset:")
+        preset_label.grid(row=0, column=5, padx=2, pady=2, sticky="e")
+        
+        preset_combo = ttk.Combobox(
+            output_frame,
+            textvariable=self.encoder_preset,
+            values=list(ENCODER_PRESETS),
+            width=8,
+            state="readonly"
+        )
+        preset_combo.grid(row=0, column=6, padx=2, pady=2, sticky="w")
+        
         self.output_label = ttk.Label(output_frame, text="No output folder selected")
-        self.output_label.grid(row=1, column=0, columnspan=3, sticky="w", padx=5, pady=2)
+        self.output_label.grid(row=1, column=0, columnspan=7, sticky="w", padx=5, pady=2)
+        
+        # One file per frame, contact sheets, or a single tar/zip archive
+        sheet_frame = ttk.Frame(output_frame)
+        sheet_frame.grid(row=2, column=0, columnspan=7, sticky="w", padx=2, pady=2)
+        
+        output_mode_label = ttk.Label(sheet_frame, text="Output:")
+        output_mode_label.grid(row=0, column=0, padx=2, sticky="e")
+        
+        output_mode_combo = ttk.Combobox(
+            sheet_frame,
+            textvariable=self.output_mode,
+            values=list(OUTPUT_MODES),
+            width=12,
+            state="readonly"
+        )
+        output_mode_combo.grid(row=0, column=1, padx=2, sticky="w")
+        
+        # Contact sheet grid, tile width and timestamps
+        sheet_grid_title = ttk.Label(sheet_frame, text="Sheet:")
+        sheet_grid_title.grid(row=0, column=2, padx=(10, 2), sticky="e")
+        
+        sheet_columns_spin = ttk.Spinbox(
+            sheet_frame,
+            from_=1,
+            to=20,
+            increment=1,
+            textvariable=self.sheet_columns,
+            width=3
+        )
+        sheet_columns_spin.grid(row=0, column=3, padx=2, sticky="w")
+        
+        sheet_grid_label = ttk.Label(sheet_frame, text="x")
+        sheet_grid_label.grid(row=0, column=4, sticky="w")
+        
+        sheet_rows_spin = ttk.Spinbox(
+            sheet_frame,
+            from_=1,
+            to=20,
+            increment=1,
+            textvariable=self.sheet_rows,
+            width=3
+        )
+        sheet_rows_spin.grid(row=0, column=5, padx=2, sticky="w")
+        
+        tile_width_label = ttk.Label(sheet_frame, text="Tile width:")
+        tile_width_label.grid(row=0, column=6, padx=(10, 2), sticky="e")
+        
+        tile_width_spin = ttk.Spinbox(
+            sheet_frame,
+            from_=64,
+            to=1920,
+            increment=32,
+            textvariable=self.sheet_tile_width,
+            width=5
+        )
+        tile_width_spin.grid(row=0, column=7, padx=2, sticky="w")
+        
+        sheet_timestamps_check = ttk.Checkbutton(
+            sheet_frame,
+            text="Timestamps",
+            variable=self.sheet_timestamps
+        )
+        sheet_timestamps_check.grid(row=0, column=8, padx=10, sticky="w")
+        
+        # Resize and colour conversion applied before encoding; 0 keeps the aspect ratio
+        transform_frame = ttk.Frame(output_frame)
+        transform_frame.grid(row=3, column=0, columnspan=7, sticky="w", padx=2, pady=2)
+        
+        resize_label = ttk.Label(transform_frame, text="Resize:")
+        resize_label.grid(row=0, column=0, padx=2, sticky="e")
+        
+        resize_width_spin = ttk.Spinbox(
+            transform_frame,
+            from_=0,
+            to=7680,
+            increment=16,
+            textvariable=self.resize_width,
+            width=5
+        )
+        resize_width_spin.grid(row=0, column=1, padx=2, sticky="w")
+        
+        ttk.Label(transform_frame, text="x").grid(row=0, column=2)
+        
+        resize_height_spin = ttk.Spinbox(
+            transform_frame,
+            from_=0,
+            to=4320,
+            increment=16,
+            textvariable=self.resize_height,
+            width=5
+        )
+        resize_height_spin.grid(row=0, column=3, padx=2, sticky="w")
+        
+        interpolation_combo = ttk.Combobox(
+            transform_frame,
+            textvariable=self.interpolation,
+            values=list(INTERPOLATIONS),
+            width=8,
+            state="readonly"
+        )
+        interpolation_combo.grid(row=0, column=4, padx=2, sticky="w")
+        
+        letterbox_check = ttk.Checkbutton(
+            transform_frame,
+            text="Letterbox",
+            variable=self.letterbox
+        )
+        letterbox_check.grid(row=0, column=5, padx=10, sticky="w")
+        
+        grayscale_check = ttk.Checkbutton(
+            transform_frame,
+            text="Grayscale",
+            variable=self.grayscale
+        )
+        grayscale_check.grid(row=0, column=6, padx=10, sticky="w")
         
         # Extraction Method
         interval_radio = ttk.Radiobutton(
@@ -162,6 +351,25 @@ class VideoToImageApp:
         )
         count_radio.grid(row=1, column=0, padx=2, pady=2, sticky="w")
         
+        scene_radio = ttk.Radiobutton(
+            extraction_frame,
+            text="Extract at Scene Changes",
+            variable=self.extraction_method,
+            value="scene",
+            command=self.update_extraction_options
+        )
+        scene_radio.grid(row=2, column=0, padx=2, pady=2, sticky="w")
+        
+        # Only the keyframes are decoded: a fast overview of long videos
+        keyframes_radio = ttk.Radiobutton(
+            extraction_frame,
+            text="Extract Keyframes Only",
+            variable=self.extraction_method,
+            value="keyframes",
+            command=self.update_extraction_options
+        )
+        keyframes_radio.grid(row=3, column=0, padx=2, pady=2, sticky="w")
+        
         # Configure extraction frame columns
         extraction_frame.columnconfigure(0, weight=1)
         extraction_frame.columnconfigure(1, weight=1)
@@ -204,6 +412,113 @@ class VideoToImageApp:
         )
         count_entry.grid(row=0, column=1, padx=2, sticky="w")
         
+        # Scene change options
+        self.scene_frame = ttk.Frame(extraction_frame)
+        self.scene_frame.grid(row=2, column=1, padx=2, pady=2, sticky="w")
+        
+        scene_metric_combo = ttk.Combobox(
+            self.scene_frame,
+            values=list(SCENE_METRICS),
+            textvariable=self.scene_metric,
+            state="readonly",
+            width=9
+        )
+        scene_metric_combo.grid(row=0, column=0, padx=2, sticky="w")
+        scene_metric_combo.bind("<<ComboboxSelected>>", self.on_scene_metric_selected)
+        
+        scene_threshold_entry = ttk.Spinbox(
+            self.scene_frame,
+            from_=0.01,
+            to=1.0,
+            increment=0.01,
+            textvariable=self.scene_threshold,
+            width=4
+        )
+        scene_threshold_entry.grid(row=0, column=1, padx=2, sticky="w")
+        
+        # Parallel decoding of video files, one process per segment
+        parallel_frame = ttk.Frame(extraction_frame)
+        parallel_frame.grid(row=4, column=0, columnspan=2, padx=2, pady=2, sticky="w")
+        
+        parallel_label = ttk.Label(parallel_frame, text="Decode processes:")
+        parallel_label.grid(row=0, column=0, padx=2, sticky="e")
+        
+        parallel_entry = ttk.Spinbox(
+            parallel_frame,
+            from_=1,
+            to=64,
+            increment=1,
+            textvariable=self.decode_processes,
+            width=4
+        )
+        parallel_entry.grid(row=0, column=1, padx=2, sticky="w")
+        
+        # Per-stage timings in the status bar and a report next to the output folder
+        timing_check = ttk.Checkbutton(
+            parallel_frame,
+            text="Timing report",
+            variable=self.instrument
+        )
+        timing_check.grid(row=0, column=2, padx=10, sticky="w")
+        
+        # Skip frames that look the same as a recently saved one
+        dedup_check = ttk.Checkbutton(
+            parallel_frame,
+            text="Skip duplicates",
+            variable=self.dedup
+        )
+        dedup_check.grid(row=0, column=3, padx=(10, 2), sticky="w")
+        
+        dedup_entry = ttk.Spinbox(
+            parallel_frame,
+            from_=0,
+            to=32,
+            increment=1,
+            textvariable=self.dedup_distance,
+            width=3
+        )
+        dedup_entry.grid(row=0, column=4, padx=2, sticky="w")
+        
+        # Save the sharpest of a few consecutive frames at each sample point
+        sharpest_label = ttk.Label(parallel_frame, text="Sharpest of:")
+        sharpest_label.grid(row=0, column=5, padx=(10, 2), sticky="e")
+        
+        sharpest_entry = ttk.Spinbox(
+            parallel_frame,
+            from_=1,
+            to=30,
+            increment=1,
+            textvariable=self.sharpest,
+            width=3
+        )
+        sharpest_entry.grid(row=0, column=6, padx=2, sticky="w")
+        
+        # Decoder backend for files and the decoder's own thread count (0 = its default)
+        decoder_label = ttk.Label(parallel_frame, text="Decoder:")
+        decoder_label.grid(row=1, column=0, padx=2, pady=(4, 0), sticky="e")
+        
+        decoder_combo = ttk.Combobox(
+            parallel_frame,
+            textvariable=self.decoder,
+            values=available_decoders(),
+            width=7,
+            state="readonly"
+        )
+        decoder_combo.grid(row=1, column=1, padx=2, pady=(4, 0), sticky="w")
+        
+        decoder_threads_label = ttk.Label(parallel_frame, text="Decoder threads:")
+        decoder_threads_label.grid(row=1, column=2, padx=(10, 2), pady=(4, 0), sticky="e")
+        
+        decoder_threads_entry = ttk.Spinbox(
+            parallel_frame,
+            from_=0,
+            to=64,
+            increment=1,
+            textvariable=self.decoder_threads,
+            width=3
+        )
+        decoder_threads_entry.grid(row=1, column=3, padx=2, pady=(4, 0), sticky="w")
+        
         # Set initial state
         self.update_extraction_options()
         
@@ -284,12 +599,13 @@ class VideoToImageApp:
     
     def update_extraction_options(self):
         method = self.extraction_method.get()
-        if method == "interval":
-            self.interval_frame.configure(style='TFrame')
-            self.count_frame.configure(style='muted.TFrame')
-        else:
-            self.interval_frame.configure(style='muted.TFrame')
-            self.count_frame.configure(style='TFrame')
+        options = {"interval": self.interval_frame, "count": self.count_frame, "scene": self.scene_frame}
+        for name, frame in options.items():
+            frame.configure(style='TFrame' if name == method else 'muted.TFrame')
+    
+    def on_scene_metric_selected(self, event):
+        # Each metric has its own score scale, so start from its default threshold
+        self.scene_threshold.set(SCENE_METRICS[self.scene_metric.get()])
     
     def on_window_resize(self, event):
         """Handle window resize events to adjust UI elements."""
@@ -332,12 +648,9 @@ class VideoToImageApp:
             self.get_video_info()
     
     def select_camera(self):
-        # Find available cameras
-        available_cameras = self.find_available_cameras()
-        
-        if not available_cameras:
-            messagebox.showinfo("No Cameras", "No camera devices found.")
-            return
+        # Probe the cameras in the background; the dialog fills in as they answer
+        results = self.camera_discovery.discover()
+        self.status_text.set("Searching for available camera devices...")
         
         # Create camera selection dialog
         camera_dialog = ttk.Toplevel(self.root)
@@ -353,17 +666,18 @@ class VideoToImageApp:
             font=("Helvetica", 12)
         ).pack(pady=10)
         
-        camera_var = ttk.IntVar()
+        camera_var = ttk.IntVar(value=-1)
+        available_cameras = {}
+        
+        camera_list = ttk.Frame(camera_dialog)
+        camera_list.pack(fill=X)
         
-        for idx, name in available_cameras.items():
-            ttk.Radiobutton(
-                camera_dialog,
-                text=name,
-                variable=camera_var,
-                value=idx
-            ).pack(anchor="w", padx=20, pady=5)
+        search_label = ttk.Label(camera_dialog, text="Searching...")
+        search_label.pack(anchor="w", padx=20)
         
         def on_select():
+            if camera_var.get() not in available_cameras:
+                return
             self.camera_idx = camera_var.get()
             self.video_source = self.camera_idx
             self.is_camera = True
@@ -371,12 +685,51 @@ class VideoToImageApp:
             self.status_text.set(f"Camera selected: {available_cameras[self.camera_idx]}")
             camera_dialog.destroy()
         
-        ttk.Button(
+        select_button = ttk.Button(
             camera_dialog,
             text="Select",
             command=on_select,
-            bootstyle=SUCCESS
-        ).pack(pady=10)
+            bootstyle=SUCCESS,
+            state=DISABLED
+        )
+        select_button.pack(pady=10)
+        
+        def add_camera(idx, name):
+            available_cameras[idx] = name
+            ttk.Radiobutton(
+                camera_list,
+                text=name,
+                variable=camera_var,
+                value=idx
+            ).pack(anchor="w", padx=20, pady=5)
+            
+            # Preselect the first camera found
+            if camera_var.get() not in available_cameras:
+                camera_var.set(idx)
+            select_button.configure(state=NORMAL)
+        
+        def poll_results():
+            if not camera_dialog.winfo_exists():
+                return
+            
+            while not results.empty():
+                message = results.get()
+                if message[0] == "camera":
+                    add_camera(message[1], message[2])
+                    continue
+                
+                # Discovery finished
+                cameras = message[1]
+                self.status_text.set(f"Found {len(cameras)} camera devices")
+                if cameras:
+                    search_label.pack_forget()
+                else:
+                    search_label.configure(text="No camera devices found.")
+                return
+            
+            camera_dialog.after(CAMERA_POLL_MS, poll_results)
+        
+        poll_results()
         
         # Center the dialog
         camera_dialog.update_idletasks()
@@ -388,25 +741,6 @@ class VideoToImageApp:
         
         self.root.wait_window(camera_dialog)
     
-    def find_available_cameras(self):
-        available_cameras = {}
-        max_test_port = 10
-        
-        self.status_text.set("Searching for available camera devices...")
-        
-        for i in range(max_test_port):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                # Try to get the camera name
-                ret, frame = cap.read()
-                if ret:
-                    camera_name = f"Camera {i}"
-                    available_cameras[i] = camera_name
-                cap.release()
-        
-        self.status_text.set(f"Found {len(available_cameras)} camera devices")
-        return available_cameras
-    
     def select_output_directory(self):
         directory = filedialog.askdirectory(
             title="Select Output Directory",
@@ -420,29 +754,31 @@ class VideoToImageApp:
     
     def get_video_info(self):
         if not self.is_camera and self.video_source:
-            cap = cv2.VideoCapture(self.video_source)
-            if cap.isOpened():
-                # Get video properties
-                self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            # Probed once per file and cached; the preview and extraction reuse the result
+            info = probe_video(self.video_source)
+            if info is not None:
+                self.show_video_info(info)
                 
-                duration = self.total_frames / fps if fps > 0 else 0
-                
-                info_text = f"Video Info: {width}x{height}, {fps:.2f} FPS, Duration: {timedelta(seconds=int(duration))}, Frames: {self.total_frames}"
-                self.status_text.set(info_text)
-                
-                # Release the capture
-                cap.release()
+                # Containers like .mkv only estimate their frame count; counting it reads the
+                # whole file, so it happens in the background and the info is refreshed after
+                if frame_count_estimated(self.video_source, info):
+                    threading.Thread(target=self.count_video_frames, args=(self.video_source,), daemon=True).start()
+    
+    def show_video_info(self, info):
+        self.total_frames = info.frame_count
+        
+        estimated = "~" if frame_count_estimated(self.video_source, info) else ""
+        info_text = f"Video Info: {info.width}x{info.height}, {info.fps:.2f} FPS, Duration: {timedelta(seconds=int(info.duration))}, Frames: {estimated}{self.total_frames}"
+        self.status_text.set(info_text)
+    
+    def count_video_frames(self, source):
+        info = count_frames(source)
+        if info is not None:
+            self.updates.post("video_info", (source, info))
     
     def toggle_preview(self):
         if self.preview_running:
-            self.preview_running = False
-            self.preview_button.configure(text="Start Preview")
-            if self.cap is not None:
-                self.cap.release()
-                self.cap = None
+            self.stop_preview()
         else:
             if self.video_source is not None:
                 self.preview_running = True
@@ -450,6 +786,7 @@ class VideoToImageApp:
                 
                 # Clear any previous content
                 self.preview_canvas.delete("all")
+                self.preview_item = None
                 
                 # Show loading message
                 center_x = self.preview_canvas.winfo_width() // 2 or 320
@@ -471,93 +808,124 @@ class VideoToImageApp:
                         font=("Helvetica", 9)
                     )
                 
-                self.root.update_idletasks()
+                # Decode in the background; frames are drawn on the Tk thread by render_preview.
+                # Sources much larger than the canvas are decoded through a cheaper proxy.
+                self.update_preview_size()
+                
+                # A decoder can outlive stop_preview's join timeout, so each session has its
+                # own encoder buffers and tags its frames; the old one's are never drawn
+                self.preview_generation += 1
+                generation = self.preview_generation
+                encoder = PPMEncoder()
+                self.preview_decoder = PreviewDecoder(
+                    self.video_source,
+                    self.is_camera,
+                    prepare=lambda frame: (generation, self.prepare_preview_frame(frame, encoder)),
+                    display_size=lambda: self.preview_size,
+                    decoder=self.decoder.get()
+                )
+                self.preview_decoder.start()
                 
-                # Start preview in a separate thread
-                self.preview_thread = threading.Thread(target=self.run_preview)
-                self.preview_thread.daemon = True
-                self.preview_thread.start()
+                self.video_aspect_ratio = None
+                self.preview_due = time.perf_counter()
+                self.preview_job = self.root.after(10, self.render_preview)
             else:
                 messagebox.showinfo("Error", "Please select a video source first.")
     
-    def run_preview(self):
-        self.cap = cv2.VideoCapture(self.video_source)
+    def stop_preview(self):
+        self.preview_running = False
+        self.preview_button.configure(text="Start Preview")
+        
+        if self.preview_job is not None:
+            self.root.after_cancel(self.preview_job)
+            self.preview_job = None
+        
+        # Give the decoder a moment to release the device (cameras can only be opened once)
+        if self.preview_decoder is not None:
+            self.preview_decoder.stop(timeout=1.0)
+            self.preview_decoder = None
+    
+    def update_preview_size(self):
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
         
-        if not self.cap.isOpened():
-            messagebox.showerror("Error", "Could not open video source.")
-            self.preview_running = False
-            self.preview_button.configure(text="Start Preview")
+        if canvas_width > 1 and canvas_height > 1:
+            self.preview_size = (canvas_width, canvas_height)
+        else:
+            # Use default dimensions if canvas is not yet properly sized
+            self.preview_size = (640, 360)
+    
+    def prepare_preview_frame(self, frame, encoder):
+        """Scale a frame to the canvas and encode it as PPM bytes. Runs on the decode thread, so no Tk calls."""
+        height, width = frame.shape[:2]
+        new_width, new_height = fit_size(width, height, *self.preview_size)
+        return encoder.encode(frame, new_width, new_height)
+    
+    def render_preview(self):
+        """Draw the newest decoded frame, then reschedule on the source's frame clock."""
+        self.preview_job = None
+        decoder = self.preview_decoder
+        if not self.preview_running or decoder is None:
             return
         
-        # Get the first frame to determine aspect ratio
-        ret, frame = self.cap.read()
-        if ret:
-            # Reset to beginning for video files
-            if not self.is_camera:
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                
-            # Get video dimensions for proper scaling
-            height, width = frame.shape[:2]
+        if decoder.error:
+            self.stop_preview()
+            messagebox.showerror("Error", decoder.error)
+            return
+        
+        # Keep the decode thread's target size in step with the canvas
+        self.update_preview_size()
+        
+        # Update UI for the video's aspect ratio once the first frame is known
+        if self.video_aspect_ratio is None and decoder.frame_size is not None:
+            width, height = decoder.frame_size
             self.video_aspect_ratio = width / height
-            
-            # Update UI for this aspect ratio
-            self.root.after(10, self.apply_aspect_ratio)
+            self.apply_aspect_ratio()
+        
+        # Stale frames were already replaced in the slot, so this is always the newest one
+        prepared = decoder.slot.take()
+        if prepared is not None:
+            generation, ppm_data = prepared
+            if generation == self.preview_generation:
+                self.draw_preview_frame(ppm_data)
+        elif not decoder.is_alive():
+            # Camera stream ended
+            self.stop_preview()
+            return
         
-        while self.preview_running:
-            ret, frame = self.cap.read()
-            
-            if not ret:
-                # If it's a video file and we reached the end, restart
-                if not self.is_camera:
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    continue
-                else:
-                    break
-            
-            # Resize frame to fit canvas
-            canvas_width = self.preview_canvas.winfo_width()
-            canvas_height = self.preview_canvas.winfo_height()
-            
-            if canvas_width > 1 and canvas_height > 1:
-                frame = self.resize_frame(frame, canvas_width, canvas_height)
-            else:
-                # Use default dimensions if canvas is not yet properly sized
-                frame = self.resize_frame(frame, 640, 360)
-                
-            # Convert frame to PhotoImage
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            photo = ImageTk.PhotoImage(image=img)
-            
-            # Clear previous content and update canvas
+        # Schedule the next frame without accumulating drift
+        period = 1.0 / (decoder.fps or DEFAULT_PREVIEW_FPS)
+        now = time.perf_counter()
+        self.preview_due = max(self.preview_due + period, now)
+        delay = max(int((self.preview_due - now) * 1000), 1)
+        self.preview_job = self.root.after(delay, self.render_preview)
+    
+    def draw_preview_frame(self, ppm_data):
+        # One PhotoImage for the whole session; its pixels are replaced in place
+        if self.preview_photo is None:
+            self.preview_photo = PhotoImage(master=self.root)
+        self.preview_photo.configure(data=ppm_data, format="PPM")
+        
+        # Determine center coordinates (handle both zero and non-zero dimensions)
+        canvas_width, canvas_height = self.preview_size
+        center = (max(canvas_width // 2, 1), max(canvas_height // 2, 1))
+        
+        # Create the canvas item once (replacing the loading message), then only move it
+        if self.preview_item is None:
             self.preview_canvas.delete("all")
-            
-            # Determine center coordinates (handle both zero and non-zero dimensions)
-            center_x = max(canvas_width // 2, 1)
-            center_y = max(canvas_height // 2, 1)
-            
-            # Update canvas
-            self.preview_canvas.create_image(
-                center_x, 
-                center_y, 
-                image=photo, 
+            self.preview_item = self.preview_canvas.create_image(
+                *center,
+                image=self.preview_photo,
                 anchor="center"
             )
-            self.preview_canvas.image = photo  # Keep a reference
-            
-            # Process any pending events to keep UI responsive
-            self.root.update_idletasks()
-            
-            # Need a small delay to refresh UI
-            time.sleep(0.03)
-        
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
-
+            self.preview_center = center
+        elif center != self.preview_center:
+            self.preview_canvas.coords(self.preview_item, *center)
+            self.preview_center = center
+    
     def apply_aspect_ratio(self):
         """Apply the video's aspect ratio to the preview canvas if possible"""
-        if hasattr(self, 'video_aspect_ratio'):
+        if getattr(self, 'video_aspect_ratio', None):
             # Get the available width
             preview_width = self.preview_canvas.winfo_width()
             if preview_width > 10:  # Only proceed if the canvas has a reasonable width
@@ -579,29 +947,14 @@ class VideoToImageApp:
                 parent_grid = preview_frame.master
                 parent_grid.rowconfigure(3, minsize=preview_height)
     
-    def resize_frame(self, frame, target_width, target_height):
-        height, width = frame.shape[:2]
-        
-        # Calculate aspect ratios
-        aspect_ratio = width / height
-        target_ratio = target_width / target_height
-        
-        # Determine new dimensions
-        if aspect_ratio > target_ratio:
-            # Width-constrained
-            new_width = target_width
-            new_height = int(target_width / aspect_ratio)
-        else:
-            # Height-constrained
-            new_height = target_height
-            new_width = int(target_height * aspect_ratio)
-        
-        # Resize frame
-        resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-        
-        return resized
-    
     def start_extraction(self):
+        # While a job runs the extract button cancels it
+        if self.extraction_thread is not None and self.extraction_thread.is_alive():
+            self.updates.cancel()
+            self.extract_button.configure(state="disabled")
+            self.status_text.set("Cancelling...")
+            return
+        
         if not self.video_source:
             messagebox.showerror("Error", "Please select a video source.")
             return
@@ -614,268 +967,106 @@ class VideoToImageApp:
         if self.preview_running:
             self.toggle_preview()
         
+        # Read the settings here; Tk variables belong to this thread
+        settings = self.get_extraction_settings()
+        
+        if self.is_camera and settings.method == "count":
+            messagebox.showinfo("Camera Mode", 
+                               "Camera mode: Press 'c' in the preview window to capture a frame, 'q' to stop.")
+        
+        self.updates.reset()
+        self.extract_button.configure(text="Cancel", bootstyle=DANGER)
+        
         # Start extraction in a separate thread
-        extraction_thread = threading.Thread(target=self.run_extraction)
-        extraction_thread.daemon = True
-        extraction_thread.start()
+        self.extraction_thread = threading.Thread(target=self.run_extraction, args=(settings,))
+        self.extraction_thread.daemon = True
+        self.extraction_thread.start()
     
-    def run_extraction(self):
-        self.extract_button.configure(state="disabled")
-        method = self.extraction_method.get()
+    def get_extraction_settings(self):
+        resize = (self.resize_width.get(), self.resize_height.get())
+        return ExtractionSettings(
+            method=self.extraction_method.get(),
+            interval=self.interval.get(),
+            frame_count=self.frame_count.get(),
+            scene_metric=self.scene_metric.get(),
+            scene_threshold=self.scene_threshold.get(),
+            output_format=self.output_format.get(),
+            encoder_preset=self.encoder_preset.get(),
+            output_mode=self.output_mode.get(),
+            sheet_columns=self.sheet_columns.get(),
+            sheet_rows=self.sheet_rows.get(),
+            sheet_tile_width=self.sheet_tile_width.get(),
+            sheet_timestamps=self.sheet_timestamps.get(),
+            writer_threads=self.writer_threads.get(),
+            decode_processes=self.decode_processes.get(),
+            decoder=self.decoder.get(),
+            decoder_threads=self.decoder_threads.get(),
+            instrument=self.instrument.get(),
+            dedup=self.dedup.get(),
+            dedup_distance=self.dedup_distance.get(),
+            sharpest=self.sharpest.get(),
+            resize=resize if any(resize) else None,
+            interpolation=self.interpolation.get(),
+            grayscale=self.grayscale.get(),
+            # Letterboxing needs a full target size
+            letterbox=self.letterbox.get() and all(resize)
+        )
+    
+    def run_extraction(self, settings):
+        # Runs on the extraction thread: never touch widgets here, only post to the bus
+        extractor = FrameExtractor(
+            self.video_source,
+            self.output_folder,
+            settings,
+            is_camera=self.is_camera,
+            progress=self.updates.progress,
+            status=self.updates.status,
+            cancel=self.updates.cancelled
+        )
         
         try:
-            if method == "interval":
-                self.extract_frames_by_interval()
-            else:
-                self.extract_frames_by_count()
+            self.updates.post("done", (settings, extractor.run()))
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred during extraction: {str(e)}")
-        finally:
-            self.extract_button.configure(state="normal")
+            self.updates.post("error", e)
     
-    def extract_frames_by_interval(self):
-        interval_seconds = self.interval.get()
-        output_format = self.output_format.get()
-        
-        # Create output folder if it doesn't exist
-        os.makedirs(self.output_folder, exist_ok=True)
-        
-        # Open the video file or camera
-        video = cv2.VideoCapture(self.video_source)
-        
-        if not video.isOpened():
-            messagebox.showerror("Error", f"Could not open video source {self.video_source}")
-            return
-        
-        # Get video properties
-        fps = video.get(cv2.CAP_PROP_FPS)
-        
-        # For camera input, fps may be low or unreliable, so we handle that differently
-        if self.is_camera or fps < 0.1:
-            fps = 30  # Assume 30 fps for cameras
-            self.status_text.set(f"Using estimated frame rate: {fps} fps")
-            
-            frame_number = 0
-            start_time = time.time()
-            
-            while True:
-                # Read the frame
-                ret, frame = video.read()
-                
-                # Break the loop if we can't read any more frames
-                if not ret:
-                    break
-                
-                current_time = time.time()
-                elapsed_time = current_time - start_time
-                
-                # Check if it's time to save a frame
-                if elapsed_time >= frame_number * interval_seconds:
-                    # Save the frame as an image
-                    timestamp_str = str(timedelta(seconds=int(elapsed_time))).replace(':', '-')
-                    output_file = os.path.join(self.output_folder, f"frame_{frame_number:04d}_{timestamp_str}.{output_format}")
-                    cv2.imwrite(output_file, frame)
-                    
-                    self.status_text.set(f"Saved frame #{frame_number}")
-                    frame_number += 1
-                
-                # Update progress (arbitrary for camera mode)
-                self.progress_value.set(min(frame_number * 10, 100))
-                
-                # Process events to keep UI responsive
-                self.root.update_idletasks()
-                
-                # Check if cancel requested
-                if not self.extract_button.instate(['disabled']):
-                    break
-        else:
-            # For video files, use the frame-based approach
-            frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = frame_count / fps
-            
-            info_text = f"Extracting frames ({interval_seconds}s interval)"
-            self.status_text.set(info_text)
-            
-            # Calculate frame interval
-            frame_interval = int(fps * interval_seconds)
-            
-            current_frame = 0
-            frame_number = 0
-            
-            while True:
-                # Set video position to the desired frame
-                video.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-                
-                # Read the frame
-                ret, frame = video.read()
-                
-                # Break the loop if we can't read any more frames
-                if not ret:
-                    break
-                
-                # Save the frame as an image
-                timestamp = current_frame / fps
-                timestamp_str = str(timedelta(seconds=int(timestamp))).replace(':', '-')
-                output_file = os.path.join(self.output_folder, f"frame_{frame_number:04d}_{timestamp_str}.{output_format}")
-                cv2.imwrite(output_file, frame)
+    def pump_updates(self):
+        latest, events = self.updates.drain()
+        
+        if "progress" in latest:
+            self.progress_value.set(latest["progress"])
+        if "status" in latest:
+            self.status_text.set(latest["status"])
+        
+        for kind, value in events:
+            if kind == "done":
+                settings, summary = value
+                self.finish_extraction()
                 
-                self.status_text.set(f"Saved frame #{frame_number}")
-                
-                # Move to the next frame
-                current_frame += frame_interval
-                frame_number += 1
-                
-                # Update progress
-                progress = min(current_frame / frame_count * 100, 100)
-                self.progress_value.set(progress)
-                
-                # Process events to keep UI responsive
-                self.root.update_idletasks()
-                
-                # Break if we've reached the end of the video
-                if current_frame >= frame_count:
-                    break
-                
-                # Check if cancel requested
-                if not self.extract_button.instate(['disabled']):
-                    break
-        
-        # Clean up
-        video.release()
-        
-        # Final status update
-        self.progress_value.set(100)
-        self.status_text.set(f"Extracted {frame_number} frames")
-        
-        # Show completion message
+                # Show completion message
+                if settings.method == "count" and summary["status"] == "ok":
+                    messagebox.showinfo("Extraction Complete", f"Successfully extracted {summary['frames']} frames to {self.output_folder}")
+            elif kind == "error":
+                self.finish_extraction()
+                messagebox.showerror("Error", f"An error occurred during extraction: {str(value)}")
+            elif kind == "video_info":
+                source, info = value
+                # Only if the file is still selected and the status line isn't reporting an extraction
+                if source == self.video_source and not self.is_camera and self.extraction_thread is None:
+                    self.show_video_info(info)
+        
+        self.root.after(UI_UPDATE_MS, self.pump_updates)
     
-    def extract_frames_by_count(self):
-        total_frames = self.frame_count.get()
-        output_format = self.output_format.get()
-        
-        # Create output folder if it doesn't exist
-        os.makedirs(self.output_folder, exist_ok=True)
-        
-        # Open the video file or camera
-        video = cv2.VideoCapture(self.video_source)
-        
-        if not video.isOpened():
-            messagebox.showerror("Error", f"Could not open video source {self.video_source}")
-            return
-        
-        # Check if it's a camera (integer index) or a file
-        if self.is_camera:
-            messagebox.showinfo("Camera Mode", 
-                               "Camera mode: Press 'c' in the preview window to capture a frame, 'q' to stop.")
-            
-            frames_captured = 0
-            
-            # Create a preview window
-            cv2.namedWindow('Camera Capture', cv2.WINDOW_NORMAL)
-            
-            while frames_captured < total_frames:
-                # Read the frame
-                ret, frame = video.read()
-                
-                # Break the loop if we can't read the frame
-                if not ret:
-                    break
-                
-                # Display frame with instructions
-                display_frame = frame.copy()
-                cv2.putText(display_frame, f"Press 'c' to capture ({frames_captured}/{total_frames})", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                cv2.imshow('Camera Capture', display_frame)
-                
-                # Wait for a key press
-                key = cv2.waitKey(1) & 0xFF
-                
-                # If 'c' is pressed, capture the frame
-                if key == ord('c'):
-                    output_file = os.path.join(self.output_folder, f"frame_{frames_captured:04d}.{output_format}")
-                    cv2.imwrite(output_file, frame)
-                    
-                    frames_captured += 1
-                    self.status_text.set(f"Captured {frames_captured}/{total_frames} frames")
-                    self.progress_value.set(frames_captured / total_frames * 100)
-                
-                # If 'q' is pressed, quit
-                elif key == ord('q'):
-                    break
-                
-                # Check if cancel requested
-                if not self.extract_button.instate(['disabled']):
-                    break
-            
-            cv2.destroyWindow('Camera Capture')
-        else:
-            # For video files
-            frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = video.get(cv2.CAP_PROP_FPS)
-            duration = frame_count / fps
-            
-            info_text = (f"Extracting {total_frames} evenly spaced frames from "
-                        f"{timedelta(seconds=int(duration))} video with {frame_count} frames")
-            self.status_text.set(info_text)
-            
-            # Calculate frame interval
-            if total_frames > frame_count:
-                total_frames = frame_count
-                self.status_text.set(f"Warning: Video has fewer frames than requested. Extracting all {total_frames} frames.")
-            
-            frame_interval = frame_count / total_frames
-            
-            for i in range(total_frames):
-                # Calculate the frame position
-                frame_position = int(i * frame_interval)
-                
-                # Set video position to the desired frame
-                video.set(cv2.CAP_PROP_POS_FRAMES, frame_position)
-                
-                # Read the frame
-                ret, frame = video.read()
-                
-                # Break the loop if we can't read any more frames
-                if not ret:
-                    break
-                
-                # Save the frame as an image
-                timestamp = frame_position / fps
-                timestamp_str = str(timedelta(seconds=int(timestamp))).replace(':', '-')
-                output_file = os.path.join(self.output_folder, f"frame_{i:04d}_{timestamp_str}.{output_format}")
-                cv2.imwrite(output_file, frame)
-                
-                self.status_text.set(f"Saved: {os.path.basename(output_file)}")
-                
-                # Update progress
-                progress = (i + 1) / total_frames * 100
-                self.progress_value.set(progress)
-                
-                # Process events to keep UI responsive
-                self.root.update_idletasks()
-                
-                # Check if cancel requested
-                if not self.extract_button.instate(['disabled']):
-                    break
-        
-        # Clean up
-        video.release()
-        cv2.destroyAllWindows()
-        
-        # Final status update
-        self.progress_value.set(100)
-        self.status_text.set(f"Extracted {total_frames} frames to {self.output_folder}")
-        
-        # Show completion message
-        messagebox.showinfo("Extraction Complete", f"Successfully extracted {total_frames} frames to {self.output_folder}")
+    def finish_extraction(self):
+        self.extraction_thread = None
+        self.extract_button.configure(text="Extract Frames", bootstyle=SUCCESS, state="normal")
     
     def on_close(self):
         # Stop preview if running
         if self.preview_running:
-            self.preview_running = False
-            if self.cap is not None:
-                self.cap.release()
+            self.stop_preview()
+        
+        # Let a running extraction stop at its next frame
+        self.updates.cancel()
         
         # Close all cv2 windows
         cv2.destroyAllWindows()
@@ -0,0 +1,405 @@
+"""Benchmark the extraction modes against synthetic videos.
+
+Test videos are generated locally with cv2.VideoWriter and kept in
+benchmarks/videos so later runs reuse them. The "camera" mode runs the
+extractor's camera path on a synthetic source that hands out frames in real
+time, like a driver does.
+Every case runs in a fresh process with an empty index cache, and results
+are saved as JSON:
+
+    python benchmarks/bench_extraction.py --quick
+    python benchmarks/bench_extraction.py --compare benchmarks/results/<earlier>.json
+    python benchmarks/bench_extraction.py --quick --decoders opencv,pyav
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from extractor import (ENCODER_PRESETS, OUTPUT_FORMATS, ExtractionSettings, FrameExtractor, available_decoders,
+                       estimate_keyframe_interval)
+from extractor.manifest import MANIFEST_NAME
+
+RESOLUTIONS = {"360p": (640, 360), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+# FourCC -> container; which ones work depends on the OpenCV/FFmpeg build
+CODECS = {"mp4v": ".mp4", "MJPG": ".avi", "VP80": ".mkv"}
+
+# Codecs that only produce keyframes, so the GOP setting doesn't apply
+INTRA_CODECS = {"MJPG"}
+
+GOPS = (12, 250)
+DURATIONS = (10, 60)
+FPS = 25
+
+# Mode -> settings for that run on each test video
+MODES = {
+    "interval": {"method": "interval", "interval": 1.0},
+    "count": {"method": "count", "frame_count": 100},
+    "scene": {"method": "scene"},
+    "keyframes": {"method": "keyframes"},
+}
+
+# Runs once per resolution on a paced synthetic source instead of a video file
+CAMERA_MODE = "camera"
+CAMERA_FPS = 30
+CAMERA_INTERVAL = 0.1
+
+QUICK = {"resolutions": ["360p"], "codecs": ["mp4v"], "gops": [12], "durations": [5]}
+
+
+def synthetic_frame(width, height, index, rng):
+    """Moving gradients, a moving box and a little noise, so every codec has real work to do."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.uint16)
+    frame = np.dstack([
+        (x + index * 4) % 256,
+        (y + index * 2) % 256,
+        ((x + y) // 2 + index * 3) % 256,
+    ]).astype(np.uint8)
+
+    size = height // 4
+    left = (index * 7) % max(width - size, 1)
+    top = (index * 3) % max(height - size, 1)
+    frame[top:top + size, left:left + size] = (255 - index % 256, 128, index % 256)
+
+    frame += rng.integers(0, 8, frame.shape, dtype=np.uint8)
+    cv2.putText(frame, str(index), (20, height - 20), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    return frame
+
+
+def generate_video(path, codec, resolution, gop, duration):
+    """Write a synthetic test video unless it already exists. Returns False if the codec is unavailable."""
+    if os.path.exists(path):
+        return True
+
+    width, height = RESOLUTIONS[resolution]
+    params = [cv2.VIDEOWRITER_PROP_KEY_INTERVAL, gop] if hasattr(cv2, "VIDEOWRITER_PROP_KEY_INTERVAL") else []
+    tmp_path = path + ".tmp" + os.path.splitext(path)[1]
+    writer = cv2.VideoWriter(tmp_path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*codec), FPS, (width, height), params)
+    if not writer.isOpened():
+        return False
+
+    rng = np.random.default_rng(0)
+    try:
+        for index in range(int(duration * FPS)):
+            writer.write(synthetic_frame(width, height, index, rng))
+    finally:
+        writer.release()
+
+    os.replace(tmp_path, path)
+    return True
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def folder_size(folder):
+    total = 0
+    for root, _, names in os.walk(folder):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    return total
+
+
+class PacedCamera:
+    """Camera stand-in that hands out pre-rendered frames at ``fps`` in real time.
+
+    grab() blocks until the next frame is due, like a driver, and a consumer
+    that falls behind misses frames instead of getting them faster later.
+    """
+
+    def __init__(self, width, height, fps, frames=FPS):
+        rng = np.random.default_rng(0)
+        self.frames = [synthetic_frame(width, height, index, rng) for index in range(frames)]
+        self.fps = fps
+        self.frame_time = 1.0 / fps
+        self.due = None
+        self.index = -1
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def grab(self):
+        now = time.monotonic()
+        if self.due is None:
+            self.due = now
+        elif now < self.due:
+            time.sleep(self.due - now)
+        self.due = max(self.due, now) + self.frame_time
+        self.index += 1
+        return True
+
+    def retrieve(self, image=None):
+        frame = self.frames[self.index % len(self.frames)]
+        if image is None or image.shape != frame.shape:
+            return True, frame.copy()
+        # Decode into the caller's buffer, as VideoCapture.retrieve does
+        np.copyto(image, frame)
+        return True, image
+
+    def release(self):
+        pass
+
+
+def sample_errors(output):
+    """How far each saved frame's timestamp is from its sampling instant, from the manifest."""
+    errors = []
+    with open(os.path.join(output, MANIFEST_NAME), encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "number" in entry:
+                errors.append(abs(entry["pts"] - entry["number"] * CAMERA_INTERVAL))
+    return errors
+
+
+def run_camera_case(resolution, duration, output_format, preset, writer_threads):
+    """Runs in a fresh process: sample a paced synthetic camera every CAMERA_INTERVAL seconds and measure it."""
+    output = tempfile.mkdtemp(prefix="bench-out-")
+    width, height = RESOLUTIONS[resolution]
+    camera = PacedCamera(width, height, CAMERA_FPS)
+
+    settings = ExtractionSettings(method="interval", interval=CAMERA_INTERVAL, output_format=output_format,
+                                  encoder_preset=preset, writer_threads=writer_threads)
+    # The camera never runs out, so the run stops after ``duration`` seconds
+    start = None
+    extractor = FrameExtractor("paced-camera", output, settings, is_camera=True, capture=camera,
+                               cancel=lambda: time.monotonic() - start >= duration)
+
+    try:
+        start = time.monotonic()
+        summary = extractor.run()
+        wall_time = time.monotonic() - start
+        peak_rss = peak_rss_mb()
+        errors = sample_errors(output)
+
+        return {
+            "status": "ok",
+            "frames": summary["frames"],
+            "wall_time": round(wall_time, 4),
+            "fps": round(summary["frames"] / wall_time, 2) if wall_time > 0 else None,
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "bytes_written": folder_size(output),
+            "writer_stall_time": round(summary["writer"]["stall_time"], 4),
+            "captured": summary["captured"],
+            "capture_fps": round(summary["captured"] / wall_time, 2) if wall_time > 0 else None,
+            "buffer_overruns": summary["buffer_overruns"],
+            "mean_sample_error_ms": round(sum(errors) / len(errors) * 1000, 2) if errors else None,
+            "max_sample_error_ms": round(max(errors) * 1000, 2) if errors else None,
+        }
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def run_case(video_path, mode, output_format, preset, writer_threads, decoder="opencv", decoder_threads=0):
+    """Runs in a fresh process: extract one video in one mode and measure it."""
+    cache = tempfile.mkdtemp(prefix="bench-cache-")
+    output = tempfile.mkdtemp(prefix="bench-out-")
+    # A cold index cache keeps runs comparable
+    os.environ["VDOTOIMAGES_CACHE"] = cache
+
+    settings = ExtractionSettings(output_format=output_format, encoder_preset=preset, writer_threads=writer_threads,
+                                  decoder=decoder, decoder_threads=decoder_threads, **MODES[mode])
+    extractor = FrameExtractor(video_path, output, settings)
+
+    try:
+        start = time.perf_counter()
+        summary = extractor.run()
+        wall_time = time.perf_counter() - start
+        peak_rss = peak_rss_mb()
+
+        return {
+            "status": summary["status"],
+            "frames": summary["frames"],
+            "wall_time": round(wall_time, 4),
+            "fps": round(summary["frames"] / wall_time, 2) if wall_time > 0 else None,
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "bytes_written": folder_size(output),
+            "writer_stall_time": round(summary["writer"]["stall_time"], 4),
+        }
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+        shutil.rmtree(cache, ignore_errors=True)
+
+
+def build_cases(args):
+    cases = []
+    for resolution in args.resolutions:
+        for codec in args.codecs:
+            gops = [1] if codec in INTRA_CODECS else args.gops
+            for gop in gops:
+                for duration in args.durations:
+                    name = f"{resolution}_{codec}_gop{gop}_{duration}s{CODECS[codec]}"
+                    cases.append({
+                        "video": name,
+                        "resolution": resolution,
+                        "codec": codec,
+                        "gop_requested": gop,
+                        "duration": duration,
+                    })
+    return cases
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["video"], r["mode"], r.get("decoder", "opencv")): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison with {baseline_path}:")
+    print(f"{'video':<32} {'mode':<9} {'decoder':<8} {'old fps':>9} {'new fps':>9} {'change':>8}")
+    for result in results:
+        old = baseline.get((result["video"], result["mode"], result["decoder"]))
+        if not old or not old.get("fps") or not result.get("fps"):
+            continue
+        change = result["fps"] / old["fps"]
+        print(f"{result['video']:<32} {result['mode']:<9} {result['decoder']:<8} "
+              f"{old['fps']:>9.1f} {result['fps']:>9.1f} {change:>7.2f}x")
+
+
+def compare_decoders(results):
+    """Frames/s of every decoder relative to OpenCV on the same video and mode."""
+    reference = {(r["video"], r["mode"]): r for r in results if r["decoder"] == "opencv" and r.get("fps")}
+
+    print("\nDecoders compared with opencv:")
+    print(f"{'video':<32} {'mode':<9} {'decoder':<8} {'opencv':>9} {'fps':>9} {'speedup':>8}")
+    for result in results:
+        base = reference.get((result["video"], result["mode"]))
+        if result["decoder"] == "opencv" or not base or not result.get("fps"):
+            continue
+        speedup = result["fps"] / base["fps"]
+        print(f"{result['video']:<32} {result['mode']:<9} {result['decoder']:<8} "
+              f"{base['fps']:>9.1f} {result['fps']:>9.1f} {speedup:>7.2f}x")
+
+
+def print_result(result):
+    mode, decoder = result["mode"], result["decoder"]
+    if result["status"] == "error":
+        print(f"  {mode:<9} {decoder:<8} error: {result['error']}")
+    else:
+        print(f"  {mode:<9} {decoder:<8} {result['frames']:>6} frames  {result['wall_time']:>8.2f}s  "
+              f"{result['fps']:>8.1f} frames/s  {result['peak_rss_mb']} MB peak  "
+              f"{result['bytes_written'] / 2 ** 20:.1f} MB written")
+
+
+def split_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="one small video per mode")
+    parser.add_argument("--resolutions", type=split_list, default=list(RESOLUTIONS))
+    parser.add_argument("--codecs", type=split_list, default=list(CODECS))
+    parser.add_argument("--gops", type=lambda v: split_list(v, int), default=list(GOPS))
+    parser.add_argument("--durations", type=lambda v: split_list(v, int), default=list(DURATIONS))
+    parser.add_argument("--modes", type=split_list, default=list(MODES) + [CAMERA_MODE])
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jpg")
+    parser.add_argument("--preset", choices=list(ENCODER_PRESETS), default="balanced")
+    parser.add_argument("--writers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--decoders", type=split_list, default=["opencv"],
+                        help=f"comma-separated decoder backends ({', '.join(available_decoders())})")
+    parser.add_argument("--decoder-threads", type=int, default=0)
+    parser.add_argument("--video-dir", default=os.path.join(BENCH_DIR, "videos"))
+    parser.add_argument("--json", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.quick:
+        for key, value in QUICK.items():
+            setattr(args, key, value)
+
+    os.makedirs(args.video_dir, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    results = []
+
+    for case in build_cases(args):
+        video_path = os.path.join(args.video_dir, case["video"])
+        print(f"Preparing {case['video']}...", flush=True)
+        if not generate_video(video_path, case["codec"], case["resolution"], case["gop_requested"], case["duration"]):
+            print(f"  codec {case['codec']} is not available in this OpenCV build, skipped")
+            continue
+        case["gop_measured"] = estimate_keyframe_interval(video_path)
+
+        for mode in args.modes:
+            if mode == CAMERA_MODE:
+                continue
+            for decoder in args.decoders:
+                # One process per case so peak RSS belongs to that case alone
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    try:
+                        measured = pool.submit(run_case, video_path, mode, args.format, args.preset, args.writers,
+                                               decoder, args.decoder_threads).result()
+                    except Exception as e:
+                        measured = {"status": "error", "error": str(e)}
+
+                results.append(dict(case, mode=mode, decoder=decoder, **measured))
+                print_result(results[-1])
+
+    if CAMERA_MODE in args.modes:
+        duration = min(args.durations)
+        for resolution in args.resolutions:
+            print(f"Sampling a {CAMERA_FPS} fps synthetic {resolution} camera for {duration}s...", flush=True)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    measured = pool.submit(run_camera_case, resolution, duration, args.format, args.preset,
+                                           args.writers).result()
+                except Exception as e:
+                    measured = {"status": "error", "error": str(e)}
+
+            results.append(dict(video=f"synthetic_{resolution}", resolution=resolution, duration=duration,
+                                mode=CAMERA_MODE, decoder="opencv", **measured))
+            print_result(results[-1])
+            if measured["status"] == "ok":
+                print(f"  {'':<18} {measured['capture_fps']:.1f} frames/s captured, "
+                      f"{measured['buffer_overruns']} overruns, sample error {measured['mean_sample_error_ms']} ms "
+                      f"mean / {measured['max_sample_error_ms']} ms max")
+
+    json_path = args.json or os.path.join(BENCH_DIR, "results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {json_path}")
+
+    if len(args.decoders) > 1:
+        compare_decoders(results)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Check that the decode planner's seeks pay off on an irregular-GOP video.
+
+Reads the same targets with the frame index and with an estimated GOP,
+counts the frames the decoder has to decode for each, and fails (exit
+status 1) when indexed seeking decodes more than unindexed seeking, or when
+the OpenCV keyframes fallback decodes any frame twice or converts anything
+but keyframes. The counts are deterministic; the timings are informational:
+
+    python benchmarks/bench_seeking.py
+    python benchmarks/bench_seeking.py --steps 300,150
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAV is the only way to place the test video's keyframes
+    av = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bench_extraction import FPS, RESOLUTIONS, split_list, synthetic_frame
+
+from extractor import DecodePlanner, estimate_keyframe_interval, get_index, read_planned
+from extractor.planner import SEEK_BACKOFF_FRAMES, SEEK_OVERHEAD_FRAMES
+
+# Keyframes 40-240 frames apart: an estimated GOP gets most of them wrong, so
+# the index changes the plan, and every badly placed seek is expensive
+VIDEO = {"codec": "mpeg4", "resolution": "360p", "min_gop": 40, "max_gop": 240, "duration": 60}
+
+STEPS = (300, 150, 37)
+
+
+def keyframe_positions(frame_count, min_gop, max_gop):
+    """Irregular, but reproducible, keyframe positions for the test video."""
+    rng = np.random.default_rng(0)
+    keyframes = []
+    frame = 0
+    while frame < frame_count:
+        keyframes.append(frame)
+        frame += int(rng.integers(min_gop, max_gop))
+    return keyframes
+
+
+def generate_irregular_gop(path, resolution, min_gop, max_gop, duration):
+    """Write the test video with PyAV, forcing a keyframe at every keyframe_positions() frame."""
+    if os.path.exists(path):
+        return
+
+    width, height = RESOLUTIONS[resolution]
+    frame_count = int(duration * FPS)
+    keyframes = set(keyframe_positions(frame_count, min_gop, max_gop))
+    tmp_path = path + ".tmp.mp4"
+    rng = np.random.default_rng(0)
+    with av.open(tmp_path, "w") as container:
+        # No scene-cut keyframes and no periodic ones: only the forced ones
+        stream = container.add_stream("mpeg4", rate=FPS, options={"sc_threshold": "1000000000"})
+        stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+        stream.codec_context.gop_size = frame_count
+        for index in range(frame_count):
+            frame = av.VideoFrame.from_ndarray(synthetic_frame(width, height, index, rng), format="bgr24")
+            if index in keyframes:
+                frame.pict_type = av.video.frame.PictureType.I
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode())
+
+    os.replace(tmp_path, path)
+
+
+class CountingCapture:
+    """Wraps a VideoCapture and counts the calls that decode, convert or seek."""
+
+    def __init__(self, video):
+        self.video = video
+        self.calls = {"grab": 0, "retrieve": 0, "set": 0}
+        self.seeks = []
+
+    def grab(self):
+        self.calls["grab"] += 1
+        return self.video.grab()
+
+    def retrieve(self, image=None):
+        self.calls["retrieve"] += 1
+        return self.video.retrieve(image)
+
+    def set(self, prop, value):
+        self.calls["set"] += 1
+        self.seeks.append((prop, value))
+        return self.video.set(prop, value)
+
+    def __getattr__(self, name):
+        return getattr(self.video, name)
+
+
+def decoded_frames(video, index):
+    """Frames the decoder decoded for the calls made on a CountingCapture.
+
+    Every grab decodes one frame. A seek to frame N also decodes, out of
+    sight, from the keyframe before N - SEEK_BACKOFF_FRAMES up to N, and pays
+    the fixed SEEK_OVERHEAD_FRAMES; the true keyframes come from ``index``.
+    """
+    decoded = video.calls["grab"]
+    for prop, value in video.seeks:
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            requested = index.frame_at(value / 1000)
+        else:
+            requested = int(value)
+        decoded += requested - index.previous_keyframe(max(requested - SEEK_BACKOFF_FRAMES, 0))
+        decoded += SEEK_OVERHEAD_FRAMES
+    return decoded
+
+
+def count_reads(source, targets, planner, index):
+    """Read ``targets`` once; returns the frames read, the frames decoded and the wall time."""
+    video = CountingCapture(cv2.VideoCapture(source))
+    start = time.perf_counter()
+    frames = [frame_index for frame_index, _ in read_planned(video, targets, planner)]
+    elapsed = time.perf_counter() - start
+    video.release()
+    return frames, decoded_frames(video, index), elapsed
+
+
+def check_seeking(source, steps):
+    """Count decoded frames for indexed against unindexed seeking at every step; returns the failures.
+
+    The indexed planner knows the true cost of every seek, so it must never
+    decode more frames than the planner working from an estimated GOP.
+    """
+    index = get_index(source)
+    if index is None:
+        raise OSError(f"Could not index {source}")
+    estimated = estimate_keyframe_interval(source)
+    print(f"{len(index.keyframe_list)} keyframes, estimated GOP {estimated} frames")
+
+    failures = []
+    print(f"{'step':>6} {'frames':>7} {'indexed':>16} {'estimated':>16}")
+    for step in steps:
+        targets = list(range(0, index.frame_count, step))
+        indexed_frames, indexed, indexed_time = count_reads(source, targets, DecodePlanner(index=index), index)
+        estimated_frames, unindexed, estimated_time = count_reads(source, targets, DecodePlanner(estimated), index)
+
+        print(f"{step:>6} {len(indexed_frames):>7} {indexed:>7} ({indexed_time:>5.2f}s) "
+              f"{unindexed:>7} ({estimated_time:>5.2f}s)")
+        if indexed_frames != targets or estimated_frames != targets:
+            failures.append(f"step {step} read {len(indexed_frames)} and {len(estimated_frames)} "
+                            f"of {len(targets)} targets")
+        if indexed > unindexed:
+            failures.append(f"step {step} decoded {indexed} frames indexed, {unindexed} unindexed")
+    return failures
+
+
+def check_keyframe_fallback(source):
+    """Read every keyframe the way the keyframes method does without PyAV; returns the failures.
+
+    OpenCV can't skip decoding P/B-frames, so the best the fallback can do is
+    grab through them once and retrieve (convert) only the keyframes. Any seek
+    would decode the GOP before its keyframe a second time.
+    """
+    index = get_index(source)
+    keyframes = index.keyframe_list
+    video = CountingCapture(cv2.VideoCapture(source))
+
+    start = time.perf_counter()
+    frames = [frame_index for frame_index, _ in read_planned(video, keyframes, DecodePlanner(index=index))]
+    elapsed = time.perf_counter() - start
+    video.release()
+
+    calls = video.calls
+    print(f"keyframes fallback: {len(frames)} keyframes in {elapsed:.2f}s, "
+          f"{calls['grab']} grabs, {calls['retrieve']} retrieves, {calls['set']} seeks")
+
+    failures = []
+    if frames != keyframes:
+        failures.append(f"read {len(frames)} of {len(keyframes)} keyframes")
+    if calls["retrieve"] != len(keyframes):
+        failures.append(f"{calls['retrieve']} retrieves for {len(keyframes)} keyframes")
+    if calls["set"] or calls["grab"] > keyframes[-1] + 1:
+        failures.append(f"{calls['set']} seeks and {calls['grab']} grabs for {keyframes[-1] + 1} frames")
+    return failures
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=lambda v: split_list(v, int), default=list(STEPS),
+                        help="comma-separated frame distances between targets")
+    parser.add_argument("--video-dir", default=os.path.join(BENCH_DIR, "videos"))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    os.makedirs(args.video_dir, exist_ok=True)
+    name = "{resolution}_{codec}_gop{min_gop}-{max_gop}_{duration}s.mp4".format(**VIDEO)
+    source = os.path.join(args.video_dir, name)
+    if av is None:
+        print("PyAV is needed to write a test video with irregular keyframes")
+        return 2
+    print(f"Preparing {name}...", flush=True)
+    generate_irregular_gop(source, VIDEO["resolution"], VIDEO["min_gop"], VIDEO["max_gop"], VIDEO["duration"])
+
+    # A private index cache, so a stale index from elsewhere can't skew the result
+    os.environ["VDOTOIMAGES_CACHE"] = tempfile.mkdtemp(prefix="bench-cache-")
+
+    status = 0
+    failures = check_seeking(source, args.steps)
+    if failures:
+        print("FAIL: seeking " + "; ".join(failures))
+        status = 1
+    else:
+        print("OK: indexed seeking never decodes more frames than unindexed")
+
+    failures = check_keyframe_fallback(source)
+    if failures:
+        print("FAIL: keyframes fallback " + "; ".join(failures))
+        status = 1
+    else:
+        print("OK: the keyframes fallback decodes every frame at most once and converts only keyframes")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+from .index import VideoIndex, build_index, get_index, load_index
+from .probe import ProbeCache, VideoInfo, count_frames, frame_count_estimated, probe_cache, probe_video
+from .decoder import DECODERS, PyAVDecoder, available_decoders, open_decoder
+from .planner import DecodePlanner, estimate_keyframe_interval, read_planned
+from .writer import (ENCODER_PRESETS, OUTPUT_FORMATS, FrameWriterPool, default_worker_count, encoder_params,
+                     frame_filename, write_frame)
+from .parallel import run_parallel, split_segments
+from .dedup import DEFAULT_DEDUP_DISTANCE, DuplicateFilter, dhash, phash
+from .sharpness import read_sharpest, sharpness
+from .scene import SCENE_METRICS, SceneDetector
+from .archive import ARCHIVE_FORMATS, ArchiveSink
+from .transform import INTERPOLATIONS, FrameTransform
+from .sheet import ContactSheetBuilder
+from .dataset import DatasetSink
+from .manifest import Manifest
+from .capture import CAPTURE_POLL, CAPTURE_RING_SIZE, CameraCapture
+from .cameras import CameraDiscovery, probe_camera
+from .engine import METHODS, OUTPUT_MODES, ExtractionSettings, FrameExtractor
+from .timing import StageTimer
+from .events import UpdateBus
+from .preview import DEFAULT_PREVIEW_FPS, FrameSlot, PPMEncoder, PreviewDecoder, choose_proxy, fit_size
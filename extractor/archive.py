@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+ARCHIVE_FORMATS = ("tar", "zip")
+
+# Archive file name inside the output folder, and the index member written last
+ARCHIVE_NAME = "frames"
+INDEX_MEMBER = "index.json"
+
+
+def tar_info(name, size):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    # A float mtime would need a PAX extended header in front of every member
+    info.mtime = int(time.time())
+    return info
+
+
+class ArchiveSink:
+    """Streams encoded frames into one tar or uncompressed zip file.
+
+    Used as the ``sink`` of a FrameWriterPool: the writer threads still
+    encode in parallel, and each finished image is appended to the archive
+    under its usual file name, so only the frames queued in the pool are
+    ever held in memory. ``close`` appends an index member listing every
+    frame with its size, the offset of its member header ("offset") and the
+    offset of its bytes ("data_offset"), so a frame can be read with one seek.
+    """
+
+    def __init__(self, output_folder, archive_format):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+
+        self.path = os.path.join(output_folder, f"{ARCHIVE_NAME}.{archive_format}")
+        self.archive_format = archive_format
+        self.lock = threading.Lock()
+        self.members = []
+
+        if archive_format == "tar":
+            # Stream mode never seeks back, so the tar is written strictly in order
+            self.archive = tarfile.open(self.path, mode="w|")
+        else:
+            self.archive = zipfile.ZipFile(self.path, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def write(self, path, data):
+        """Append ``data`` (any bytes-like object) as a member named after ``path``."""
+        name = os.path.basename(path)
+        data = memoryview(data).cast("B")
+
+        with self.lock:
+            if self.archive_format == "tar":
+                offset = self.archive.offset
+                self.archive.addfile(tar_info(name, len(data)), io.BytesIO(data))
+                # The data is followed by padding up to the next 512-byte block
+                blocks = (len(data) + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+                data_offset = self.archive.offset - blocks * tarfile.BLOCKSIZE
+            else:
+                offset = self.archive.fp.tell()
+                self.archive.writestr(zipfile.ZipInfo(name, time.localtime()[:6]), data)
+                # Stored members of a seekable zip have no data descriptor after the data
+                data_offset = self.archive.fp.tell() - len(data)
+            self.members.append({"name": name, "size": len(data), "offset": offset, "data_offset": data_offset})
+
+    def close(self):
+        """Append the index member and finish the archive."""
+        with self.lock:
+            if self.archive is None:
+                return
+
+            index = json.dumps({"format": self.archive_format, "frames": self.members}, indent=1).encode("utf-8")
+            if self.archive_format == "tar":
+                self.archive.addfile(tar_info(INDEX_MEMBER, len(index)), io.BytesIO(index))
+            else:
+                self.archive.writestr(INDEX_MEMBER, index)
+
+            self.archive.close()
+            self.archive = None
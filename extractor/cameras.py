@@ -0,0 +1,145 @@
+import glob
+import queue
+import re
+import threading
+import time
+
+import cv2
+
+# Camera indices tried where there is no /dev/video* list to go by
+MAX_CAMERA_INDEX = 10
+
+# Longest a single device may take to open and deliver a frame
+PROBE_TIMEOUT = 3.0
+
+# How long a discovery result is reused while the device list stays the same
+CAMERA_CACHE_TTL = 30.0
+
+
+def device_list():
+    """Sorted /dev/video* device nodes; empty where the platform has none."""
+    return tuple(sorted(glob.glob("/dev/video*")))
+
+
+def candidate_indices(devices):
+    """Camera indices worth probing: the /dev/videoN numbers, or 0..MAX_CAMERA_INDEX-1."""
+    if not devices:
+        return list(range(MAX_CAMERA_INDEX))
+
+    indices = set()
+    for device in devices:
+        match = re.search(r"(\d+)$", device)
+        if match:
+            indices.add(int(match.group(1)))
+    return sorted(indices)
+
+
+def probe_camera(index):
+    """Return a display name if camera ``index`` opens and delivers a frame, else None."""
+    cap = cv2.VideoCapture(index)
+    try:
+        if cap.isOpened():
+            ret, _ = cap.read()
+            if ret:
+                return f"Camera {index}"
+        return None
+    finally:
+        cap.release()
+
+
+class CameraDiscovery:
+    """Finds working cameras by probing all candidate devices at once, off the caller's thread.
+
+    ``discover`` returns a queue that receives ("camera", index, name) as each
+    device answers and a final ("done", cameras) once every probe has answered
+    or run out of PROBE_TIMEOUT. Probes run on daemon threads, so a device that
+    hangs in the driver only delays its own result and never blocks exit.
+    Results are reused for CAMERA_CACHE_TTL seconds as long as the /dev/video*
+    list hasn't changed; a discover call while a scan is running joins it.
+    """
+
+    def __init__(self, ttl=CAMERA_CACHE_TTL, timeout=PROBE_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lock = threading.Lock()
+
+        self.cache_key = None
+        self.cache_time = 0.0
+        self.cameras = None
+
+        # State of the scan in progress, if any
+        self.listeners = []
+        self.found = {}
+        self.scanning = False
+
+    def cached(self, devices=None):
+        """The cached {index: name}, or None when it is stale or the device list changed."""
+        devices = device_list() if devices is None else devices
+        with self.lock:
+            if (self.cameras is not None and self.cache_key == devices
+                    and time.monotonic() - self.cache_time < self.ttl):
+                return dict(self.cameras)
+        return None
+
+    def discover(self, refresh=False):
+        results = queue.Queue()
+        devices = device_list()
+
+        cameras = None if refresh else self.cached(devices)
+        if cameras is not None:
+            for index, name in cameras.items():
+                results.put(("camera", index, name))
+            results.put(("done", cameras))
+            return results
+
+        with self.lock:
+            # Replay what the running scan has found so far and follow it from there
+            for index, name in self.found.items():
+                results.put(("camera", index, name))
+            self.listeners.append(results)
+            if self.scanning:
+                return results
+            self.scanning = True
+            self.found = {}
+
+        threading.Thread(target=self.scan, args=(devices,), name="camera-discovery", daemon=True).start()
+        return results
+
+    def scan(self, devices):
+        answers = queue.Queue()
+
+        def probe(index):
+            try:
+                answers.put((index, probe_camera(index)))
+            except Exception:
+                answers.put((index, None))
+
+        indices = candidate_indices(devices)
+        for index in indices:
+            threading.Thread(target=probe, args=(index,), name=f"camera-probe-{index}", daemon=True).start()
+
+        deadline = time.monotonic() + self.timeout
+        for _ in indices:
+            try:
+                index, name = answers.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                # Whatever is still probing has timed out
+                break
+
+            if name is not None:
+                with self.lock:
+                    self.found[index] = name
+                    for listener in self.listeners:
+                        listener.put(("camera", index, name))
+
+        with self.lock:
+            cameras = dict(sorted(self.found.items()))
+            self.cameras = cameras
+            self.cache_key = devices
+            self.cache_time = time.monotonic()
+
+            for listener in self.listeners:
+                listener.put(("done", dict(cameras)))
+            self.listeners = []
+            self.found = {}
+            self.scanning = False
@@ -0,0 +1,107 @@
+import threading
+import time
+
+# Frames kept by the capture ring; at 30 fps this is about a second of history
+CAPTURE_RING_SIZE = 32
+
+# How long a saver waits for a frame before checking for cancellation
+CAPTURE_POLL = 0.1
+
+
+class CameraCapture(threading.Thread):
+    """Drains a camera on its own thread into a fixed-size ring of recent frames.
+
+    Every frame is stamped with time.monotonic() right after grab(), so its
+    timestamp is when the driver handed it over, not when the consumer got
+    around to it. Decoding goes into the buffer of the frame the ring is about
+    to drop, so no per-frame arrays are allocated. ``nearest`` returns a copy
+    of the frame closest to a target instant; a target whose frames were
+    already overwritten counts as an overrun.
+    """
+
+    def __init__(self, video, size=CAPTURE_RING_SIZE, timer=None):
+        super().__init__(name="camera-capture")
+        self.daemon = True
+        self.video = video
+        self.size = max(int(size), 2)
+        self.timer = timer
+
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.finished = False
+        self.error = None
+
+        # Ring slots hold (timestamp, frame); the newest is at (head - 1) % size
+        self.slots = [None] * self.size
+        self.head = 0
+        self.captured = 0
+        self.overruns = 0
+
+    def run(self):
+        spare = None
+        try:
+            while not self.stop_event.is_set():
+                if self.timer is not None:
+                    start = time.perf_counter()
+
+                if not self.video.grab():
+                    break
+                timestamp = time.monotonic()
+
+                ret, frame = self.video.retrieve(spare)
+                if not ret:
+                    break
+
+                if self.timer is not None:
+                    self.timer.add("read", time.perf_counter() - start)
+
+                with self.condition:
+                    evicted = self.slots[self.head]
+                    self.slots[self.head] = (timestamp, frame)
+                    self.head = (self.head + 1) % self.size
+                    self.captured += 1
+                    self.condition.notify_all()
+
+                # The dropped frame's buffer receives the next frame
+                spare = evicted[1] if evicted is not None else None
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def nearest(self, target, timeout=None):
+        """Wait until a frame at or after ``target`` (a time.monotonic() value) has been captured.
+
+        Returns (timestamp, frame) for the captured frame closest to ``target``,
+        copied so it can be kept, or None if no frame has reached ``target``
+        within ``timeout`` seconds or the capture has ended.
+        """
+        with self.condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.finished and (self.captured == 0 or self.newest()[0] < target):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            if self.captured == 0 or self.newest()[0] < target:
+                return None
+
+            entries = [slot for slot in self.slots if slot is not None]
+            oldest = min(entries, key=lambda slot: slot[0])
+            if oldest[0] > target and self.captured > self.size:
+                # The frames around the target were overwritten before we got here
+                self.overruns += 1
+
+            timestamp, frame = min(entries, key=lambda slot: abs(slot[0] - target))
+            return timestamp, frame.copy()
+
+    def newest(self):
+        return self.slots[(self.head - 1) % self.size]
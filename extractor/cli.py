@@ -0,0 +1,249 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .decoder import DECODERS
+from .dedup import DEFAULT_DEDUP_DISTANCE, HASH_METHODS
+from .engine import METHODS, OUTPUT_MODES, ExtractionSettings, FrameExtractor
+from .transform import INTERPOLATIONS
+from .writer import ENCODER_PRESETS, OUTPUT_FORMATS
+from .scene import SCENE_METRICS
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv")
+
+
+def find_videos(inputs, recursive=False):
+    """Expand files, directories and glob patterns into a sorted list of video files."""
+    found = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            walk = os.walk(pattern) if recursive else [(pattern, [], os.listdir(pattern))]
+            for folder, _, names in walk:
+                found.extend(os.path.join(folder, name) for name in names
+                             if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif glob.has_magic(pattern):
+            found.extend(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        elif os.path.isfile(pattern):
+            found.append(pattern)
+        else:
+            print(f"warning: no such file or directory: {pattern}", file=sys.stderr)
+
+    # Keep the first occurrence of each file
+    unique = {}
+    for path in found:
+        unique.setdefault(os.path.abspath(path), path)
+    return sorted(unique.values())
+
+
+def output_folders(sources, output_root):
+    """One output folder per video, named after the file and made unique when names clash."""
+    folders = []
+    used = set()
+    for source in sources:
+        name = os.path.splitext(os.path.basename(source))[0]
+        candidate = name
+        suffix = 2
+        while candidate in used:
+            candidate = f"{name}_{suffix}"
+            suffix += 1
+        used.add(candidate)
+        folders.append(os.path.join(output_root, candidate))
+    return folders
+
+
+def extract_file(source, output_folder, settings):
+    """Process pool task: extract one video and return its summary."""
+    start = time.perf_counter()
+    try:
+        return FrameExtractor(source, output_folder, settings).run()
+    except Exception as e:
+        return {
+            "source": source,
+            "output_folder": output_folder,
+            "status": "error",
+            "error": str(e),
+            "frames": 0,
+            "elapsed": round(time.perf_counter() - start, 3),
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m extractor",
+        description="Extract image frames from many videos without a display."
+    )
+    parser.add_argument("inputs", nargs="+", help="video files, directories or glob patterns")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output folder; each video gets a subfolder named after it")
+    parser.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    parser.add_argument("-m", "--method", choices=METHODS, default="interval", help="extraction method")
+    parser.add_argument("-i", "--interval", type=float, default=1.0, help="seconds between frames (interval method)")
+    parser.add_argument("-n", "--count", type=int, default=10, help="number of frames per video (count method)")
+    parser.add_argument("--scene-metric", choices=list(SCENE_METRICS), default="histogram",
+                        help="frame difference score (scene method)")
+    parser.add_argument("--scene-threshold", type=float,
+                        help="score from 0 to 1 that starts a new scene (default depends on the metric)")
+    parser.add_argument("--dedup", action="store_true", help="skip frames that look the same as a recently saved one")
+    parser.add_argument("--dedup-hash", choices=HASH_METHODS, default="dhash", help="perceptual hash used by --dedup")
+    parser.add_argument("--dedup-distance", type=int, default=DEFAULT_DEDUP_DISTANCE,
+                        help="maximum Hamming distance (of 64 bits) between duplicates")
+    parser.add_argument("--sharpest", type=int, default=1,
+                        help="score this many consecutive frames per sample and save the sharpest")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="jpg", help="output image format")
+    parser.add_argument("--output-mode", choices=OUTPUT_MODES, default="frames",
+                        help="one file per frame, frames tiled onto contact sheets, a tar/zip archive "
+                             "or a memory-mapped .npy array")
+    parser.add_argument("--sheet-grid", default="5x5", metavar="COLUMNSxROWS", help="tiles per contact sheet")
+    parser.add_argument("--tile-width", type=int, default=320, help="contact sheet tile width in pixels")
+    parser.add_argument("--dataset-size", metavar="WIDTHxHEIGHT", help="resize frames to this size in npy mode")
+    parser.add_argument("--no-timestamps", action="store_true", help="leave timestamps off contact sheet tiles")
+    parser.add_argument("--resize", metavar="WIDTHxHEIGHT",
+                        help="resize frames before encoding; 0 for one side keeps the aspect ratio")
+    parser.add_argument("--scale", type=float, help="resize frames by this factor before encoding")
+    parser.add_argument("--interpolation", choices=list(INTERPOLATIONS), default="area",
+                        help="interpolation used by --resize and --scale")
+    parser.add_argument("--crop", metavar="X,Y,WIDTH,HEIGHT", help="keep only this region of the source frames")
+    parser.add_argument("--grayscale", action="store_true", help="save grayscale frames")
+    parser.add_argument("--letterbox", action="store_true",
+                        help="fit frames inside --resize keeping the aspect ratio and pad the rest")
+    parser.add_argument("--preset", choices=list(ENCODER_PRESETS), default="balanced",
+                        help="encoder speed/size trade-off")
+    parser.add_argument("--quality", type=int, help="JPEG/WebP quality (1-100), overrides the preset")
+    parser.add_argument("--png-compression", type=int, choices=range(10), metavar="0-9",
+                        help="PNG compression level, overrides the preset")
+    parser.add_argument("--optimize", action="store_true", default=None, help="optimized JPEG Huffman tables")
+    parser.add_argument("--progressive", action="store_true", default=None, help="progressive JPEG")
+    parser.add_argument("--lossless", action="store_true", default=None, help="lossless WebP")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="videos processed concurrently (default: number of CPUs)")
+    parser.add_argument("--writers", type=int, default=2, help="encode/write threads per video")
+    parser.add_argument("--processes", type=int, default=1, help="decode processes per video")
+    parser.add_argument("--decoder", choices=DECODERS, default="opencv", help="video decoder backend")
+    parser.add_argument("--decoder-threads", type=int, default=0,
+                        help="decoder threads per capture (default: the backend's own choice)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="rewrite every frame instead of skipping those a previous run already wrote")
+    parser.add_argument("--timing", action="store_true",
+                        help="write a per-stage timing report next to each output folder")
+    parser.add_argument("--summary", help="summary JSON path (default: <output>/summary.json)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        sheet_columns, sheet_rows = (int(n) for n in args.sheet_grid.lower().split("x"))
+    except ValueError:
+        parser.error(f"invalid --sheet-grid {args.sheet_grid!r}, expected e.g. 5x4")
+
+    dataset_size = None
+    if args.dataset_size:
+        try:
+            dataset_size = tuple(int(n) for n in args.dataset_size.lower().split("x"))
+        except ValueError:
+            dataset_size = ()
+        if len(dataset_size) != 2:
+            parser.error(f"invalid --dataset-size {args.dataset_size!r}, expected e.g. 224x224")
+
+    resize = None
+    if args.resize:
+        try:
+            resize = tuple(int(n) for n in args.resize.lower().split("x"))
+        except ValueError:
+            resize = ()
+        if len(resize) != 2:
+            parser.error(f"invalid --resize {args.resize!r}, expected e.g. 1280x720 or 640x0")
+
+    crop = None
+    if args.crop:
+        try:
+            crop = tuple(int(n) for n in args.crop.split(","))
+        except ValueError:
+            crop = ()
+        if len(crop) != 4:
+            parser.error(f"invalid --crop {args.crop!r}, expected e.g. 0,140,1920,800")
+
+    if args.letterbox and (resize is None or not all(resize)):
+        parser.error("--letterbox needs --resize with both a width and a height")
+
+    sources = find_videos(args.inputs, args.recursive)
+    if not sources:
+        print("No video files found.", file=sys.stderr)
+        return 2
+
+    settings = ExtractionSettings(
+        method=args.method,
+        interval=args.interval,
+        frame_count=args.count,
+        scene_metric=args.scene_metric,
+        scene_threshold=args.scene_threshold,
+        dedup=args.dedup,
+        dedup_hash=args.dedup_hash,
+        dedup_distance=args.dedup_distance,
+        sharpest=args.sharpest,
+        output_format=args.format,
+        output_mode=args.output_mode,
+        sheet_columns=sheet_columns,
+        sheet_rows=sheet_rows,
+        sheet_tile_width=args.tile_width,
+        sheet_timestamps=not args.no_timestamps,
+        dataset_size=dataset_size,
+        encoder_preset=args.preset,
+        encoder_options={
+            "quality": args.quality,
+            "compression": args.png_compression,
+            "optimize": args.optimize,
+            "progressive": args.progressive,
+            "lossless": args.lossless,
+        },
+        writer_threads=args.writers,
+        decode_processes=args.processes,
+        decoder=args.decoder,
+        decoder_threads=args.decoder_threads,
+        instrument=args.timing,
+        resume=not args.no_resume,
+        resize=resize,
+        scale=args.scale,
+        interpolation=args.interpolation,
+        crop=crop,
+        grayscale=args.grayscale,
+        letterbox=args.letterbox,
+    )
+
+    os.makedirs(args.output, exist_ok=True)
+    folders = output_folders(sources, args.output)
+    jobs = max(min(args.jobs, len(sources)), 1)
+    print(f"Extracting {len(sources)} videos with {jobs} concurrent jobs")
+
+    summaries = []
+    start = time.perf_counter()
+    # Spawn keeps workers free of the parent's threads and behaves the same on every platform
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = [pool.submit(extract_file, source, folder, settings)
+                   for source, folder in zip(sources, folders)]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            detail = summary.get("error") or f"{summary['frames']} frames in {summary['elapsed']:.1f}s"
+            print(f"[{len(summaries)}/{len(sources)}] {summary['status']:>9}  {summary['source']}: {detail}")
+
+    summaries.sort(key=lambda summary: summary["source"])
+    summary_path = args.summary or os.path.join(args.output, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "elapsed": round(time.perf_counter() - start, 3),
+            "settings": vars(args),
+            "files": summaries,
+        }, f, indent=2)
+
+    failed = sum(1 for summary in summaries if summary["status"] == "error")
+    print(f"Done: {len(summaries) - failed} succeeded, {failed} failed. Summary written to {summary_path}")
+    return 1 if failed else 0
@@ -0,0 +1,111 @@
+import os
+import struct
+
+import cv2
+import numpy as np
+
+# Files written into the output folder
+DATASET_NAME = "frames.npy"
+TIMESTAMPS_NAME = "timestamps.npy"
+
+# Frames allocated first when the frame count isn't known in advance; the
+# array then doubles, by at most DATASET_MAX_GROWTH bytes at a time
+DATASET_CHUNK = 16
+DATASET_MAX_GROWTH = 1 << 30
+
+# Fixed .npy header size, so the frame count can be rewritten in place
+HEADER_SIZE = 128
+
+
+def npy_header(shape):
+    """Version 1.0 .npy header for a C-ordered uint8 array, padded to HEADER_SIZE bytes."""
+    header = "{'descr': '|u1', 'fortran_order': False, 'shape': %r, }" % (tuple(shape),)
+    header = header.ljust(HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class DatasetSink:
+    """Writes frames into one memory-mapped uint8 .npy array instead of image files.
+
+    The array has shape (frames, height, width, channels) in OpenCV's BGR
+    order and is allocated up front from the planned frame count (``reserve``).
+    When the count isn't known it starts small and doubles as it fills, so
+    the file never gets much larger than the frames written. Frames are
+    copied, or resized to ``size`` (width, height), straight into the mapped
+    file, so nothing is encoded. ``close`` trims the array to the frames written
+    and saves their timestamps in seconds next to it; both files load with
+    ``np.load(path, mmap_mode="r")``.
+    """
+
+    def __init__(self, output_folder, size=None):
+        self.path = os.path.join(output_folder, DATASET_NAME)
+        self.timestamps_path = os.path.join(output_folder, TIMESTAMPS_NAME)
+        self.size = size
+        self.planned = None
+
+        self.frame_shape = None
+        self.array = None
+        self.capacity = 0
+        self.count = 0
+        self.timestamps = []
+
+    def reserve(self, count):
+        """Make room for ``count`` frames in total."""
+        self.planned = count
+        if self.array is not None and self.capacity < count:
+            self.resize(count)
+
+    def resize(self, capacity):
+        """Set the array's frame capacity by rewriting the header and resizing the file."""
+        if self.array is not None:
+            self.array.flush()
+            # The mapping has to go before the file can change size (required on Windows)
+            self.array = None
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+            f.write(npy_header((capacity,) + self.frame_shape))
+            f.truncate(HEADER_SIZE + capacity * frame_bytes)
+
+        self.capacity = capacity
+        if capacity > 0:
+            self.array = np.memmap(self.path, dtype=np.uint8, mode="r+", offset=HEADER_SIZE,
+                                   shape=(capacity,) + self.frame_shape)
+
+    def growth(self):
+        """Frames to add to a full array: as many as it holds, up to DATASET_MAX_GROWTH bytes."""
+        frame_bytes = int(np.prod(self.frame_shape))
+        return max(min(self.capacity, DATASET_MAX_GROWTH // frame_bytes), 1)
+
+    def add(self, frame, seconds):
+        if self.frame_shape is None:
+            if self.size is not None:
+                width, height = self.size
+                self.frame_shape = (height, width) + frame.shape[2:]
+            else:
+                self.frame_shape = frame.shape
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.resize(max(self.planned or DATASET_CHUNK, 1))
+
+        if self.count == self.capacity:
+            self.resize(self.capacity + self.growth())
+
+        slot = self.array[self.count]
+        if frame.shape == self.frame_shape:
+            slot[...] = frame
+        else:
+            height, width = self.frame_shape[:2]
+            cv2.resize(frame, (width, height), dst=slot, interpolation=cv2.INTER_AREA)
+
+        self.timestamps.append(seconds)
+        self.count += 1
+
+    def close(self):
+        """Trim the array to the frames written and save the timestamps."""
+        if self.frame_shape is None:
+            return
+
+        self.resize(self.count)
+        self.array = None
+        np.save(self.timestamps_path, np.array(self.timestamps, dtype=np.float64))
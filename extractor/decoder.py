@@ -0,0 +1,178 @@
+import cv2
+
+try:
+    import av
+except ImportError:  # PyAV is optional, the OpenCV decoder is always available
+    av = None
+
+DECODERS = ("opencv", "pyav")
+
+# Codec threading for the PyAV decoder: "AUTO" (frame + slice), "FRAME", "SLICE" or "NONE"
+THREAD_TYPES = ("AUTO", "FRAME", "SLICE", "NONE")
+
+
+def available_decoders():
+    """The decoder backends that can be used in this installation."""
+    return [backend for backend in DECODERS if backend != "pyav" or av is not None]
+
+
+def open_decoder(source, backend="opencv", threads=0, thread_type="AUTO", pixel_format="bgr24",
+                 keyframes_only=False):
+    """Open ``source`` with the chosen decoder backend.
+
+    Every backend has the part of the cv2.VideoCapture interface the extractors
+    use (isOpened, grab, retrieve, read, get, set, release), so "opencv" simply
+    returns a VideoCapture. ``threads`` is the number of decoder threads, 0 for
+    the library default. Cameras always go through OpenCV. ``keyframes_only``
+    (pyav only) makes the decoder skip every non-key frame without decoding it.
+    """
+    if backend not in DECODERS:
+        raise ValueError(f"Unknown decoder: {backend}")
+
+    if backend == "opencv" or not isinstance(source, str):
+        if threads > 0 and hasattr(cv2, "CAP_PROP_N_THREADS"):
+            return cv2.VideoCapture(source, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, int(threads)])
+        return cv2.VideoCapture(source)
+
+    if av is None:
+        raise ImportError("The pyav decoder needs PyAV (pip install av)")
+    return PyAVDecoder(source, threads, thread_type, pixel_format, keyframes_only)
+
+
+class PyAVDecoder:
+    """VideoCapture-compatible decoder on top of PyAV/FFmpeg.
+
+    Sets the codec's thread count and threading type, which OpenCV doesn't
+    expose, converts frames straight from the decoder's output to
+    ``pixel_format`` ("bgr24" or "gray") in retrieve(), and reports exact
+    timestamps: ``timestamp`` and CAP_PROP_POS_MSEC are the grabbed frame's
+    own PTS relative to the stream start, like OpenCV's but never estimated.
+    Seeks land on the keyframe before the target and decode forward to the
+    exact frame, so setting a position is always frame accurate.
+
+    With ``keyframes_only`` the codec drops every packet that isn't a keyframe
+    before decoding it, so grab() steps from keyframe to keyframe; positions
+    are meaningless then and only ``timestamp`` identifies a frame.
+    """
+
+    def __init__(self, source, threads=0, thread_type="AUTO", pixel_format="bgr24", keyframes_only=False):
+        self.pixel_format = pixel_format
+        self.container = None
+        self.frame = None
+        self.pending = None
+        self.position = 0  # index of the frame the next grab() returns
+        self.timestamp = None
+
+        try:
+            self.container = av.open(source)
+            self.stream = self.container.streams.video[0]
+        except (av.error.FFmpegError, IndexError):
+            # Not readable (or no video stream): isOpened() reports it like OpenCV does
+            self.release()
+            return
+
+        self.stream.thread_type = thread_type
+        self.stream.codec_context.thread_count = max(int(threads), 0)
+        if keyframes_only:
+            self.stream.codec_context.skip_frame = "NONKEY"
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self.start = self.stream.start_time or 0
+        self.frames = self.container.decode(self.stream)
+
+    def isOpened(self):
+        return self.container is not None
+
+    def frame_time(self, frame):
+        if frame.pts is None:
+            return self.position / self.fps if self.fps else 0.0
+        return float((frame.pts - self.start) * self.stream.time_base)
+
+    def next_frame(self):
+        try:
+            return next(self.frames)
+        except (StopIteration, av.error.FFmpegError):
+            return None
+
+    def grab(self):
+        if self.container is None:
+            return False
+
+        if self.pending is not None:
+            frame, self.pending = self.pending, None
+        else:
+            frame = self.next_frame()
+        if frame is None:
+            self.frame = None
+            return False
+
+        self.frame = frame
+        self.timestamp = self.frame_time(frame)
+        self.position += 1
+        return True
+
+    def retrieve(self, image=None):
+        # ``image`` is accepted for VideoCapture compatibility; the frame is always a new array
+        if self.frame is None:
+            return False, None
+        return True, self.frame.to_ndarray(format=self.pixel_format)
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def seek(self, seconds):
+        """Position the decoder so the next grab() returns the first frame at or after ``seconds``."""
+        seconds = max(seconds, 0.0)
+        offset = self.start + int(seconds / self.stream.time_base)
+        self.container.seek(offset, stream=self.stream, backward=True, any_frame=False)
+        self.frames = self.container.decode(self.stream)
+        self.frame = None
+        self.pending = None
+
+        # Decode forward from the keyframe; half a frame of slack absorbs rounding in the target
+        tolerance = 0.5 / self.fps if self.fps else 0.0
+        while True:
+            frame = self.next_frame()
+            if frame is None or self.frame_time(frame) >= seconds - tolerance:
+                self.pending = frame
+                break
+
+        self.position = round(seconds * self.fps) if self.fps else 0
+        return self.pending is not None
+
+    def get(self, prop):
+        if self.container is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.timestamp * 1000 if self.timestamp is not None else 0.0
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.stream.frames)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.stream.codec_context.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.stream.codec_context.height)
+        return 0.0
+
+    def set(self, prop, value):
+        if self.container is None:
+            return False
+        try:
+            if prop == cv2.CAP_PROP_POS_MSEC:
+                return self.seek(value / 1000)
+            if prop == cv2.CAP_PROP_POS_FRAMES:
+                return self.seek(value / self.fps if self.fps else 0.0)
+        except av.error.FFmpegError:
+            return False
+        return False
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
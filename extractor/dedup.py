@@ -0,0 +1,71 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+HASH_METHODS = ("dhash", "phash")
+
+# Hamming distance (out of 64 bits) up to which two frames count as the same image
+DEFAULT_DEDUP_DISTANCE = 6
+
+# Kept frames each new frame is compared against
+DEDUP_WINDOW = 8
+
+
+def dhash(frame):
+    """64-bit difference hash: brighter-than-right-neighbour bits of a 9x8 grayscale thumbnail."""
+    small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def phash(frame):
+    """64-bit perceptual hash: low DCT frequencies of a 32x32 thumbnail against their median."""
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    low = cv2.dct(np.float32(small))[:8, :8]
+    bits = low > np.median(low[1:, 1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class DuplicateFilter:
+    """Drops frames whose perceptual hash is close to one of the recently kept frames.
+
+    Only the hashes of the last ``window`` kept frames are remembered, so a
+    scene that comes back much later is kept again. ``skipped`` counts the
+    frames dropped as duplicates.
+    """
+
+    def __init__(self, method="dhash", max_distance=DEFAULT_DEDUP_DISTANCE, window=DEDUP_WINDOW):
+        if method not in HASH_METHODS:
+            raise ValueError(f"Unknown hash method: {method}")
+
+        self.method = method
+        self.hash = dhash if method == "dhash" else phash
+        self.max_distance = max_distance
+        self.window = window
+        self.recent = deque(maxlen=window)
+        self.skipped = 0
+        self.last_hash = None  # hash of the frame last checked
+
+    def options(self):
+        """Constructor arguments, for building the same filter in a worker process."""
+        return {"method": self.method, "max_distance": self.max_distance, "window": self.window}
+
+    def is_duplicate(self, frame):
+        """Return True if ``frame`` should be skipped; otherwise remember it as kept."""
+        frame_hash = self.last_hash = self.hash(frame)
+        for kept_hash in self.recent:
+            if bin(frame_hash ^ kept_hash).count("1") <= self.max_distance:
+                self.skipped += 1
+                return True
+
+        self.recent.append(frame_hash)
+        return False
+
+    def seed(self, hashes):
+        """Remember ``hashes`` as kept frames, e.g. the ones an earlier run wrote before resuming."""
+        self.recent.extend(hashes)
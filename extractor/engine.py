@@ -0,0 +1,801 @@
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+
+import cv2
+
+from .archive import ArchiveSink
+from .capture import CAPTURE_POLL, CameraCapture
+from .dataset import DatasetSink
+from .decoder import available_decoders, open_decoder
+from .dedup import DEFAULT_DEDUP_DISTANCE, DuplicateFilter
+from .index import get_index
+from .manifest import Manifest, output_variant
+from .parallel import run_parallel
+from .probe import probe_cache, probe_video
+from .planner import SEEK_BACKOFF_FRAMES, DecodePlanner, estimate_keyframe_interval, read_planned
+from .scene import SCENE_SAMPLE_FPS, SceneDetector
+from .sharpness import read_sharpest
+from .sheet import ContactSheetBuilder
+from .timing import StageTimer
+from .transform import FrameTransform
+from .writer import FrameWriterPool, default_worker_count, encoder_params, frame_filename
+
+METHODS = ("interval", "count", "scene", "keyframes")
+OUTPUT_MODES = ("frames", "contact_sheet", "tar", "zip", "npy")
+
+
+@dataclass
+class ExtractionSettings:
+    """Everything that controls an extraction job, independent of any UI."""
+
+    method: str = "interval"
+    interval: float = 1.0
+    frame_count: int = 10
+    scene_metric: str = "histogram"
+    scene_threshold: float = None  # None: the metric's default from SCENE_METRICS
+    dedup: bool = False
+    dedup_hash: str = "dhash"
+    dedup_distance: int = DEFAULT_DEDUP_DISTANCE
+    sharpest: int = 1  # candidate frames per sample; the sharpest one is saved
+    output_format: str = "jpg"
+    output_mode: str = "frames"
+    sheet_columns: int = 5
+    sheet_rows: int = 5
+    sheet_tile_width: int = 320
+    sheet_timestamps: bool = True
+    dataset_size: tuple = None  # (width, height) frames are resized to in "npy" mode; None keeps the source size
+    encoder_preset: str = "balanced"
+    encoder_options: dict = field(default_factory=dict)  # overrides for the preset, see encoder_params
+    writer_threads: int = field(default_factory=default_worker_count)
+    decode_processes: int = 1
+    decoder: str = "opencv"  # decoder backend, see DECODERS
+    decoder_threads: int = 0  # decoder threads per capture; 0 for the backend's default
+    instrument: bool = False
+    resume: bool = True  # skip frames the output folder's manifest lists as written
+    resize: tuple = None  # (width, height) frames are resized to before encoding; 0 keeps the aspect ratio
+    scale: float = None  # resize factor, instead of ``resize``
+    interpolation: str = "area"  # see INTERPOLATIONS
+    crop: tuple = None  # (x, y, width, height) region of interest in source pixels
+    grayscale: bool = False
+    letterbox: bool = False  # fit inside ``resize`` keeping the aspect ratio and pad the rest
+
+
+class FrameExtractor:
+    """Runs one extraction job from a video file or camera without any GUI.
+
+    Progress (0-100) and status text are reported through the optional
+    ``progress`` and ``status`` callbacks; ``cancel`` is polled between frames
+    and stops the job when it returns True. With ``settings.instrument`` the
+    per-stage timings are appended to the status text and written as a
+    JSON/CSV report next to the output folder. With ``settings.dedup`` frames
+    that look the same as a recently saved one are skipped before encoding.
+    The "keyframes" method saves every keyframe and decodes nothing else.
+    An already opened ``capture`` (anything with the VideoCapture read/grab
+    interface) is read instead of opening ``source``, and released at the end.
+    The "contact_sheet" output mode tiles the frames onto sheets instead of
+    writing one file per frame, "tar" and "zip" stream the images into a
+    single archive and "npy" stores raw frames in a memory-mapped array
+    without encoding them; these modes always decode in this process.
+
+    In "frames" mode every written frame is recorded in the folder's manifest,
+    and a rerun skips the targets a previous run with the same source and
+    output settings already wrote (and left intact); a scene run continues
+    after the last scene it wrote.
+    """
+
+    def __init__(self, source, output_folder, settings, is_camera=False,
+                 progress=None, status=None, cancel=None, capture=None):
+        self.source = source
+        self.source_capture = capture
+        self.output_folder = output_folder
+        self.settings = settings
+        self.is_camera = is_camera
+        self.progress = progress or (lambda percent: None)
+        self.status_callback = status or (lambda text: None)
+        self.cancel = cancel or (lambda: False)
+
+        self.writer = None
+        self.sheets = None
+        self.archive = None
+        self.dataset = None
+        self.manifest = None
+        self.timer = StageTimer() if settings.instrument else None
+        self.encoder_params = encoder_params(settings.output_format, settings.encoder_preset,
+                                             **settings.encoder_options)
+        self.transform = FrameTransform(settings.resize, settings.scale, settings.interpolation, settings.crop,
+                                        settings.grayscale, settings.letterbox)
+        self.variant = output_variant(settings.output_format, self.encoder_params, settings.sharpest,
+                                      self.transform.options() if self.transform.active else None,
+                                      (settings.scene_metric, settings.scene_threshold)
+                                      if settings.method == "scene" else None,
+                                      (settings.dedup_hash, settings.dedup_distance) if settings.dedup else None)
+        self.info = None
+        self.capture = None
+        self.duplicates = None
+        if settings.dedup:
+            self.duplicates = DuplicateFilter(settings.dedup_hash, settings.dedup_distance)
+        self.frames_written = 0
+        self.frames_resumed = 0
+        self.cancelled = False
+        self.last_status = ""
+        self.report_paths = None
+
+    def run(self):
+        """Run the job and return its summary."""
+        if self.settings.method not in METHODS:
+            raise ValueError(f"Unknown extraction method: {self.settings.method}")
+        if self.settings.output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {self.settings.output_mode}")
+
+        # Create output folder if it doesn't exist
+        os.makedirs(self.output_folder, exist_ok=True)
+
+        # Properties of a video file come from the probe cache, so nothing is opened twice
+        self.info = None if self.is_camera else probe_video(self.source)
+
+        # Open the video file or camera, unless the caller already did
+        video = self.source_capture
+        if video is None:
+            video = open_decoder(self.source, self.settings.decoder, self.settings.decoder_threads)
+        if not video.isOpened():
+            raise OSError(f"Could not open video source {self.source}")
+
+        if self.settings.output_mode in ("tar", "zip"):
+            self.archive = ArchiveSink(self.output_folder, self.settings.output_mode)
+        elif self.settings.output_mode == "npy":
+            self.dataset = DatasetSink(self.output_folder, self.settings.dataset_size)
+        elif self.settings.output_mode == "frames":
+            self.manifest = Manifest(self.output_folder, self.source)
+            self.manifest.start(settings=asdict(self.settings))
+
+        start = time.perf_counter()
+        try:
+            # Encode and write frames on worker threads while decoding continues
+            with FrameWriterPool(self.settings.writer_threads, timer=self.timer, sink=self.archive,
+                                 manifest=self.manifest) as writer:
+                self.writer = writer
+                # Transformed frames stay in their buffer until a writer has encoded them
+                self.transform.reserve(writer.max_pending + writer.workers + 1)
+                if self.settings.output_mode == "contact_sheet":
+                    self.sheets = ContactSheetBuilder(
+                        self.output_folder, self.settings.output_format, writer,
+                        columns=self.settings.sheet_columns,
+                        rows=self.settings.sheet_rows,
+                        tile_width=self.settings.sheet_tile_width,
+                        labels=self.settings.sheet_timestamps,
+                        params=self.encoder_params
+                    )
+
+                try:
+                    if self.settings.method == "interval":
+                        self.extract_by_interval(video)
+                    elif self.settings.method == "count":
+                        self.extract_by_count(video)
+                    elif self.settings.method == "keyframes":
+                        self.extract_by_keyframes(video)
+                    else:
+                        self.extract_by_scene(video)
+                finally:
+                    # Write the last, partly filled sheet
+                    if self.sheets is not None:
+                        self.sheets.close()
+        finally:
+            video.release()
+
+            # The writers are done, so the index can go at the end of the archive
+            if self.archive is not None:
+                self.archive.close()
+            if self.dataset is not None:
+                self.dataset.close()
+            if self.manifest is not None:
+                self.manifest.close()
+
+        elapsed = time.perf_counter() - start
+        if self.timer is not None:
+            self.write_timing_report()
+
+        self.progress(100)
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        summary = {
+            "source": str(self.source),
+            "output_folder": self.output_folder,
+            "status": "cancelled" if self.cancelled else "ok",
+            "frames": self.frames_written,
+            "elapsed": round(elapsed, 3),
+            "settings": asdict(self.settings),
+            "writer": self.writer.stats(),
+        }
+        if self.duplicates is not None:
+            summary["duplicates_skipped"] = self.duplicates.skipped
+        if self.capture is not None:
+            summary["captured"] = self.capture.captured
+            summary["buffer_overruns"] = self.capture.overruns
+        if self.sheets is not None:
+            summary["sheets"] = self.sheets.sheets_written
+        if self.archive is not None:
+            summary["archive"] = self.archive.path
+        if self.dataset is not None:
+            summary["dataset"] = self.dataset.path
+        if self.manifest is not None:
+            summary["manifest"] = self.manifest.path
+            summary["resumed"] = self.frames_resumed
+        if self.report_paths is not None:
+            summary["timing_report"] = self.report_paths[0]
+        return summary
+
+    def status(self, text):
+        self.last_status = text
+        if self.timer is not None:
+            text = f"{text} | {self.timer.live_summary()}"
+        self.status_callback(text)
+
+    def write_timing_report(self):
+        """Write the stage timings next to the output folder and show them in the final status."""
+        base_path = os.path.normpath(self.output_folder) + "_timing"
+        self.report_paths = self.timer.write_report(
+            base_path,
+            source=str(self.source),
+            output_folder=self.output_folder,
+            frames=self.frames_written,
+            settings=asdict(self.settings),
+            writer=self.writer.stats()
+        )
+
+        # Force a fresh live summary that includes the last encodes and writes
+        self.timer.live_updated = 0.0
+        self.status(self.last_status)
+
+    def is_cancelled(self):
+        if not self.cancelled and self.cancel():
+            self.cancelled = True
+        return self.cancelled
+
+    def output_summary(self):
+        """Writer summary for the final status, with the duplicate count when dedup is on."""
+        summary = self.writer.summary()
+        if self.duplicates is not None:
+            summary += f", {self.duplicates.skipped} duplicates skipped"
+        return summary
+
+    def transform_frame(self, frame):
+        if not self.transform.active:
+            return frame
+
+        if self.timer is not None:
+            transform_start = time.perf_counter()
+        frame = self.transform.apply(frame)
+        if self.timer is not None:
+            self.timer.add("transform", time.perf_counter() - transform_start)
+        return frame
+
+    def is_duplicate(self, frame):
+        if self.duplicates is None:
+            return False
+
+        if self.timer is not None:
+            hash_start = time.perf_counter()
+        duplicate = self.duplicates.is_duplicate(frame)
+        if self.timer is not None:
+            self.timer.add("dedup", time.perf_counter() - hash_start)
+            if duplicate:
+                self.timer.count("duplicates")
+        return duplicate
+
+    def save(self, number, seconds, frame, target=None, frame_index=None):
+        """Queue a frame for writing under the shared naming scheme and return its path.
+
+        Returns None without writing anything when the frame is a near-duplicate;
+        the manifest still records the target as done. In contact sheet and npy
+        modes the path is that of the sheet or array the frame is placed in.
+        ``target`` and ``frame_index`` go into the manifest. The settings'
+        crop/resize/grayscale transform is applied first.
+        """
+        frame = self.transform_frame(frame)
+        record = self.manifest_record(number, seconds, target, frame_index)
+        if self.is_duplicate(frame):
+            if record is not None:
+                self.manifest.skip(record)
+            return None
+
+        if self.dataset is not None:
+            self.dataset.add(frame, seconds)
+            self.frames_written += 1
+            return self.dataset.path
+
+        if self.sheets is not None:
+            self.frames_written += 1
+            return self.sheets.add(frame, str(timedelta(seconds=int(seconds))))
+
+        output_file = os.path.join(self.output_folder, frame_filename(number, seconds, self.settings.output_format))
+        if record is not None and self.duplicates is not None:
+            # Lets a resumed run compare its next frames with this one
+            record["hash"] = self.duplicates.last_hash
+        self.writer.submit(output_file, frame, self.encoder_params, record)
+        self.frames_written += 1
+        return output_file
+
+    def manifest_record(self, number, seconds, target=None, frame_index=None):
+        if self.manifest is None:
+            return None
+        return {"number": number, "target": target, "frame": frame_index,
+                "pts": round(seconds, 6), "variant": self.variant}
+
+    def resume_targets(self, numbered_targets):
+        """Drop the targets the manifest lists as already written; returns the rest."""
+        if self.manifest is None or not self.settings.resume:
+            return numbered_targets
+
+        completed = self.manifest.completed(self.variant)
+        remaining = [(number, frame_index) for number, frame_index in numbered_targets
+                     if (number, frame_index) not in completed]
+
+        resumed = len(numbered_targets) - len(remaining)
+        if resumed:
+            self.frames_resumed += resumed
+            self.status(f"Resuming: {resumed} of {len(numbered_targets)} frames already extracted")
+            if remaining:
+                self.seed_duplicates(completed, remaining[0][0])
+        return remaining
+
+    def seed_duplicates(self, completed, number):
+        """Fill the duplicate window with the frames an earlier run wrote before target ``number``."""
+        if self.duplicates is None:
+            return
+        kept = [entry for (kept_number, _), entry in sorted(completed.items())
+                if kept_number < number and "hash" in entry]
+        self.duplicates.seed(entry["hash"] for entry in kept)
+
+    def source_fps(self, video):
+        """Frame rate of the source: the probed one for files, the capture's for cameras."""
+        if self.info is not None:
+            return self.info.fps
+        return video.get(cv2.CAP_PROP_FPS)
+
+    def source_frame_count(self, video):
+        if self.info is not None:
+            return self.info.frame_count
+        return int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def create_decode_planner(self, video):
+        """Return the frame count and a decode planner for a video file."""
+        # PyAV seeks straight to the keyframe before the target, OpenCV backs off first
+        backoff = 0 if self.settings.decoder == "pyav" else SEEK_BACKOFF_FRAMES
+
+        # The cached frame index gives an exact frame count, keyframes and timestamps
+        self.status("Indexing video...")
+        expected = self.source_frame_count(video)
+
+        def on_indexed(packets):
+            if expected > 0:
+                self.status(f"Indexing video... {min(packets / expected, 1):.0%}")
+
+        index = get_index(self.source, progress=on_indexed, cancel=self.is_cancelled)
+
+        if index is not None:
+            probe_cache.verified(self.source, index.frame_count)
+            return index.frame_count, DecodePlanner(index=index, seek_backoff=backoff)
+
+        # No index: fall back to the probed frame count and an estimated GOP
+        return self.source_frame_count(video), DecodePlanner(estimate_keyframe_interval(self.source),
+                                                             seek_backoff=backoff)
+
+    def extract_targets(self, video, numbered_targets, frame_count, planner, fps, on_saved):
+        """Save (number, frame_index) targets sequentially or across decode processes.
+
+        ``on_saved(position, number, frame_index, path)`` is called after each
+        sequentially saved frame, with its position in ``numbered_targets``.
+        Targets already written by an earlier run are skipped.
+        """
+        # Cancelled while indexing
+        if self.is_cancelled():
+            return
+
+        total = len(numbered_targets)
+        numbered_targets = self.resume_targets(numbered_targets)
+        resumed = total - len(numbered_targets)
+
+        if self.dataset is not None:
+            self.dataset.reserve(len(numbered_targets))
+
+        processes = self.settings.decode_processes
+        # Sheets, archives and datasets are written by this process only, and
+        # a capture handed in can't be reopened by the decode processes
+        if (processes > 1 and self.sheets is None and self.archive is None and self.dataset is None
+                and self.source_capture is None):
+            # Decode keyframe-aligned segments in separate processes
+            self.status(f"Extracting with {processes} processes")
+
+            def on_progress(done):
+                done += resumed
+                self.progress(done / total * 100)
+                self.status(f"Saved {done}/{total} frames")
+
+            skipped_before = self.duplicates.skipped if self.duplicates is not None else 0
+            saved = run_parallel(
+                self.source, numbered_targets, frame_count, planner, fps,
+                self.output_folder, self.settings.output_format, processes,
+                encoder_params=self.encoder_params,
+                writer_threads=max(self.settings.writer_threads // processes, 1),
+                progress=on_progress,
+                cancel=self.is_cancelled,
+                timer=self.timer,
+                duplicates=self.duplicates,
+                transform=self.transform if self.transform.active else None,
+                decoder=self.settings.decoder,
+                decoder_threads=self.settings.decoder_threads,
+                sharpest=self.settings.sharpest,
+                manifest=self.manifest,
+                variant=self.variant
+            )
+            self.frames_written += saved
+            if self.duplicates is not None:
+                # Duplicates were read fine, they just weren't written
+                saved += self.duplicates.skipped - skipped_before
+        else:
+            numbers = [number for number, _ in numbered_targets]
+            targets = [frame_index for _, frame_index in numbered_targets]
+
+            if self.settings.sharpest > 1:
+                # Score a few consecutive frames from each target on and keep the sharpest
+                frames = read_sharpest(video, targets, self.settings.sharpest, planner, self.timer)
+            else:
+                frames = ((target, target, frame) for target, frame in read_planned(video, targets, planner, self.timer))
+
+            saved = 0
+            for position, (target, frame_index, frame) in enumerate(frames):
+                # Named after the frame actually saved
+                path = self.save(numbers[position], planner.time_of(frame_index, fps), frame, target, frame_index)
+                saved += 1
+                on_saved(position + resumed, numbers[position], target, path)
+
+                # Check if cancel requested
+                if self.is_cancelled():
+                    break
+
+        # Targets that couldn't be read, e.g. past a truncated end of file
+        if self.timer is not None and not self.cancelled:
+            self.timer.count("dropped", len(numbered_targets) - saved)
+
+    def extract_by_interval(self, video):
+        interval_seconds = self.settings.interval
+
+        # Get video properties
+        fps = self.source_fps(video)
+
+        # For camera input, fps may be low or unreliable, so we handle that differently
+        if self.is_camera or fps < 0.1:
+            fps = 30  # Assume 30 fps for cameras
+            self.status(f"Using estimated frame rate: {fps} fps")
+
+            # A capture thread keeps draining the camera while frames are saved, and
+            # each target instant gets the grabbed frame closest to it
+            self.capture = CameraCapture(video, timer=self.timer)
+            self.capture.start()
+
+            frame_number = 0
+            start_time = time.monotonic()
+
+            try:
+                while not self.is_cancelled():
+                    target_time = start_time + frame_number * interval_seconds
+                    nearest = self.capture.nearest(target_time, timeout=CAPTURE_POLL)
+                    if nearest is None:
+                        if self.capture.finished:
+                            break
+                        continue
+
+                    timestamp, frame = nearest
+                    overrun = f" ({self.capture.overruns} buffer overruns)" if self.capture.overruns else ""
+                    if self.save(frame_number, timestamp - start_time, frame):
+                        self.status(f"Saved frame #{frame_number}{overrun}")
+                    else:
+                        self.status(f"Skipped duplicate frame #{frame_number}{overrun}")
+                    frame_number += 1
+
+                    # Update progress (arbitrary for camera mode)
+                    self.progress(min(frame_number * 10, 100))
+            finally:
+                self.capture.stop()
+
+            if self.timer is not None:
+                self.timer.count("skipped", max(self.capture.captured - frame_number, 0))
+                self.timer.count("overruns", self.capture.overruns)
+            if self.capture.error is not None:
+                raise self.capture.error
+        else:
+            # For video files, use the frame-based approach
+            frame_count, planner = self.create_decode_planner(video)
+
+            self.status(f"Extracting frames ({interval_seconds}s interval)")
+
+            # Calculate frame interval
+            frame_interval = max(int(fps * interval_seconds), 1)
+            targets = range(0, frame_count, frame_interval)
+
+            def on_saved(position, number, frame_index, path):
+                if path:
+                    self.status(f"Saved frame #{number}")
+                else:
+                    self.status(f"Skipped duplicate frame #{number}")
+
+                # Update progress
+                self.progress(min((frame_index + frame_interval) / frame_count * 100, 100))
+
+            self.extract_targets(video, list(enumerate(targets)), frame_count, planner, fps, on_saved)
+
+        # Final status update
+        self.status(f"Extracted {self.frames_written} frames ({self.output_summary()})")
+
+    def extract_by_count(self, video):
+        total_frames = self.settings.frame_count
+
+        # Check if it's a camera (integer index) or a file
+        if self.is_camera:
+            frames_captured = 0
+            start_time = time.time()
+            if self.dataset is not None:
+                self.dataset.reserve(total_frames)
+
+            # Create a preview window
+            cv2.namedWindow('Camera Capture', cv2.WINDOW_NORMAL)
+
+            while frames_captured < total_frames:
+                # Read the frame
+                ret, frame = video.read()
+
+                # Break the loop if we can't read the frame
+                if not ret:
+                    break
+
+                # Display frame with instructions
+                display_frame = frame.copy()
+                cv2.putText(display_frame, f"Press 'c' to capture ({frames_captured}/{total_frames})",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+                cv2.imshow('Camera Capture', display_frame)
+
+                # Wait for a key press
+                key = cv2.waitKey(1) & 0xFF
+
+                # If 'c' is pressed, capture the frame
+                if key == ord('c'):
+                    saved = self.save(frames_captured, time.time() - start_time, frame)
+
+                    frames_captured += 1
+                    if saved:
+                        self.status(f"Captured {frames_captured}/{total_frames} frames")
+                    else:
+                        self.status(f"Skipped duplicate capture {frames_captured}/{total_frames}")
+                    self.progress(frames_captured / total_frames * 100)
+
+                # If 'q' is pressed, quit
+                elif key == ord('q'):
+                    break
+
+                # Check if cancel requested
+                if self.is_cancelled():
+                    break
+
+            cv2.destroyWindow('Camera Capture')
+        else:
+            # For video files
+            frame_count, planner = self.create_decode_planner(video)
+            fps = self.source_fps(video)
+            duration = frame_count / fps
+
+            self.status(f"Extracting {total_frames} evenly spaced frames from "
+                        f"{timedelta(seconds=int(duration))} video with {frame_count} frames")
+
+            # Calculate frame interval
+            if total_frames > frame_count:
+                total_frames = frame_count
+                self.status(f"Warning: Video has fewer frames than requested. Extracting all {total_frames} frames.")
+
+            frame_interval = frame_count / total_frames
+            targets = [int(i * frame_interval) for i in range(total_frames)]
+
+            def on_saved(position, number, frame_index, path):
+                if path:
+                    self.status(f"Saved: {os.path.basename(path)}")
+                else:
+                    self.status(f"Skipped duplicate frame #{number}")
+
+                # Update progress
+                self.progress((position + 1) / total_frames * 100)
+
+            self.extract_targets(video, list(enumerate(targets)), frame_count, planner, fps, on_saved)
+
+        # Final status update
+        self.status(f"Extracted {self.frames_written} frames to {self.output_folder} ({self.output_summary()})")
+
+    def extract_by_keyframes(self, video):
+        if self.is_camera:
+            raise ValueError("Keyframe extraction needs a video file")
+
+        frame_count, planner = self.create_decode_planner(video)
+        fps = self.source_fps(video)
+
+        if planner.index is not None:
+            # The demuxer's keyframe flags
+            targets = planner.index.keyframe_list
+            self.status(f"Extracting {len(targets)} keyframes")
+        else:
+            # No index: keyframes are assumed to sit on multiples of the estimated GOP
+            targets = list(range(0, frame_count, planner.keyframe_interval))
+            self.status(f"Extracting {len(targets)} estimated keyframes (every {planner.keyframe_interval} frames)")
+
+        def on_saved(position, number, frame_index, path):
+            if path:
+                self.status(f"Saved keyframe #{number} at {timedelta(seconds=int(planner.time_of(frame_index, fps)))}")
+            else:
+                self.status(f"Skipped duplicate keyframe #{number}")
+
+            # Update progress
+            self.progress((position + 1) / len(targets) * 100)
+
+        if planner.index is not None and "pyav" in available_decoders():
+            # One pass in which the decoder drops every non-key packet undecoded
+            self.read_keyframes(list(enumerate(targets)), planner.index, on_saved)
+        else:
+            # OpenCV can't skip decoding P/B-frames, and a seek to a keyframe would decode the
+            # GOP before it again, so the planner grabs through them and converts only keyframes
+            self.extract_targets(video, list(enumerate(targets)), frame_count, planner, fps, on_saved)
+
+        # Final status update
+        self.status(f"Extracted {self.frames_written} keyframes ({self.output_summary()})")
+
+    def read_keyframes(self, numbered_targets, index, on_saved):
+        """Save the (number, frame_index) keyframe targets in one keyframes-only PyAV pass.
+
+        Frames are named after their own PTS; the index maps each one back to
+        its frame number for the manifest.
+        """
+        numbers = {frame_index: number for number, frame_index in numbered_targets}
+        remaining = set(frame_index for _, frame_index in self.resume_targets(numbered_targets))
+        resumed = len(numbered_targets) - len(remaining)
+        if self.dataset is not None:
+            self.dataset.reserve(len(remaining))
+
+        decoder = open_decoder(self.source, "pyav", self.settings.decoder_threads, keyframes_only=True)
+        saved = 0
+        try:
+            if not decoder.isOpened():
+                raise OSError(f"Could not open video source {self.source}")
+
+            position = resumed
+            while not self.is_cancelled():
+                if self.timer is not None:
+                    read_start = time.perf_counter()
+
+                ret, frame = decoder.read()
+                if not ret:
+                    break
+
+                if self.timer is not None:
+                    self.timer.add("read", time.perf_counter() - read_start)
+
+                frame_index = index.frame_at(decoder.timestamp)
+                if frame_index not in remaining:
+                    # Written by an earlier run, or not flagged as a keyframe by the demuxer
+                    continue
+
+                path = self.save(numbers[frame_index], decoder.timestamp, frame, frame_index, frame_index)
+                saved += 1
+                on_saved(position, numbers[frame_index], frame_index, path)
+                position += 1
+        finally:
+            decoder.release()
+
+        if self.timer is not None and not self.cancelled:
+            self.timer.count("dropped", len(remaining) - saved)
+
+    def resume_scenes(self, video, fps, detector):
+        """Continue after the last scene an earlier run wrote; returns (its frame index, next scene number).
+
+        Scenes are numbered in the order they are found, so only an unbroken run
+        of written scenes from #0 on counts. The video is left just past that
+        scene's frame, which becomes the detector's reference again, so the
+        following cuts are the same as in an uninterrupted run. Returns (-1, 0)
+        with the video at the start when there is nothing to resume.
+        """
+        if self.manifest is None or not self.settings.resume:
+            return -1, 0
+
+        done = self.manifest.completed(self.variant)
+        completed = {number: entry for (number, _), entry in done.items()}
+        scenes = 0
+        while scenes in completed:
+            scenes += 1
+        if scenes == 0:
+            return -1, 0
+
+        last = completed[scenes - 1]
+        video.set(cv2.CAP_PROP_POS_FRAMES, last["target"])
+
+        # Trust the seek only if it landed on the recorded timestamp
+        landed = video.grab() and abs(video.get(cv2.CAP_PROP_POS_MSEC) / 1000 - last["pts"]) < 0.5 / fps
+        ret, frame = video.retrieve() if landed else (False, None)
+        if not ret:
+            video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return -1, 0
+
+        detector.update(frame)
+        self.seed_duplicates(done, scenes)
+        self.frames_resumed += scenes
+        self.status(f"Resuming after scene #{scenes}")
+        return last["target"], scenes
+
+    def extract_by_scene(self, video):
+        detector = SceneDetector(self.settings.scene_metric, self.settings.scene_threshold)
+
+        # Cameras are scored frame by frame against the wall clock
+        fps = self.source_fps(video)
+        live = self.is_camera or fps < 0.1
+        frame_count = 0 if live else self.source_frame_count(video)
+
+        # Score a few frames per second in one sequential pass; the rest are only grabbed
+        step = 1 if live else max(round(fps / SCENE_SAMPLE_FPS), 1)
+
+        self.status(f"Detecting scene changes ({detector.metric} score >= {detector.threshold})")
+
+        start_time = time.time()
+        # A rerun continues after the last scene an earlier run wrote
+        frame_index, scene_number = (-1, 0) if live else self.resume_scenes(video, fps, detector)
+
+        while True:
+            if self.timer is not None:
+                read_start = time.perf_counter()
+
+            # Break the loop if we can't read any more frames
+            if not video.grab():
+                break
+            frame_index += 1
+
+            if frame_index % step:
+                if self.timer is not None:
+                    self.timer.add("read", time.perf_counter() - read_start)
+                    self.timer.count("skipped")
+                continue
+
+            ret, frame = video.retrieve()
+            if not ret:
+                break
+
+            if self.timer is not None:
+                self.timer.add("read", time.perf_counter() - read_start)
+                score_start = time.perf_counter()
+
+            new_scene = detector.update(frame)
+
+            if self.timer is not None:
+                self.timer.add("score", time.perf_counter() - score_start)
+
+            if new_scene:
+                if live:
+                    seconds = time.time() - start_time
+                else:
+                    # Timestamp of the grabbed frame, exact for variable frame rates too
+                    seconds = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if self.save(scene_number, seconds, frame, frame_index, frame_index):
+                    self.status(f"Scene #{scene_number + 1} at {timedelta(seconds=int(seconds))} "
+                                f"(score {detector.last_score:.2f})")
+                else:
+                    self.status(f"Skipped duplicate scene #{scene_number + 1}")
+                scene_number += 1
+
+            # Update progress (arbitrary for camera mode)
+            if frame_count > 0:
+                self.progress(min((frame_index + 1) / frame_count * 100, 100))
+            else:
+                self.progress(min(scene_number * 10, 100))
+
+            # Check if cancel requested
+            if self.is_cancelled():
+                break
+
+        # Final status update
+        self.status(f"Extracted {self.frames_written} scene frames ({self.output_summary()})")
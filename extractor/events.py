@@ -0,0 +1,55 @@
+import queue
+import threading
+
+# Update kinds where only the newest value matters between two UI refreshes
+LATEST_ONLY = ("progress", "status")
+
+
+class UpdateBus:
+    """One channel from worker threads to the UI thread, plus an explicit cancel signal.
+
+    Workers only ever ``post`` (or call ``progress``/``status``), which puts a
+    small tuple on a queue and never touches a widget. The UI thread calls
+    ``drain`` at its own fixed rate: progress and status are coalesced to the
+    newest value, every other event is returned in the order it was posted.
+    How often workers report therefore has no effect on how often the UI
+    repaints, and the other way round.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.cancel_event = threading.Event()
+
+    def post(self, kind, value=None):
+        self.queue.put((kind, value))
+
+    def progress(self, percent):
+        self.post("progress", percent)
+
+    def status(self, text):
+        self.post("status", text)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def reset(self):
+        """Clear the cancel signal before starting a new job."""
+        self.cancel_event.clear()
+
+    def drain(self):
+        """Take everything posted so far: ({kind: newest value} for LATEST_ONLY kinds, [other events])."""
+        latest = {}
+        events = []
+        while True:
+            try:
+                kind, value = self.queue.get_nowait()
+            except queue.Empty:
+                return latest, events
+
+            if kind in LATEST_ONLY:
+                latest[kind] = value
+            else:
+                events.append((kind, value))
@@ -0,0 +1,242 @@
+import hashlib
+import os
+from bisect import bisect_right
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # PyAV is optional, OpenCV is used to build the index without it
+    av = None
+
+INDEX_VERSION = 1
+
+# Packets scanned between progress reports and cancel checks while indexing
+INDEX_PROGRESS_PACKETS = 1000
+
+
+def cache_dir():
+    """Directory where per-video index files are kept."""
+    base = os.environ.get("VDOTOIMAGES_CACHE")
+    if not base:
+        root = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+            or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(root, "vdotoimages")
+    return os.path.join(base, "index")
+
+
+def source_key(source):
+    """Cache key for a video file: absolute path + size + modification time."""
+    path = os.path.abspath(source)
+    stat = os.stat(path)
+    raw = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def index_path(source):
+    return os.path.join(cache_dir(), source_key(source) + ".npz")
+
+
+class VideoIndex:
+    """Per-frame PTS, keyframe flag and byte offset of a video, in presentation order.
+
+    ``pts`` is in ``time_base`` units and relative to the stream start, which is
+    the same reference OpenCV uses for CAP_PROP_POS_MSEC. Offsets are -1 when
+    the backend that built the index couldn't report them.
+    """
+
+    def __init__(self, pts, keyframes, offsets, time_base):
+        self.pts = np.asarray(pts, dtype=np.int64)
+        self.keyframes = np.asarray(keyframes, dtype=bool)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.time_base = (int(time_base[0]), int(time_base[1]))
+
+        self.times = self.pts * (self.time_base[0] / self.time_base[1])
+        self.keyframe_list = np.flatnonzero(self.keyframes).tolist()
+        if not self.keyframe_list or self.keyframe_list[0] != 0:
+            # Decoding always starts from the first frame, treat it as a keyframe
+            self.keyframe_list.insert(0, 0)
+
+    @property
+    def frame_count(self):
+        return len(self.pts)
+
+    @property
+    def duration(self):
+        if not len(self.times):
+            return 0.0
+        if len(self.times) > 1:
+            # Add one average frame duration for the last frame
+            return float(self.times[-1] + (self.times[-1] - self.times[0]) / (len(self.times) - 1))
+        return float(self.times[-1])
+
+    @property
+    def fps(self):
+        duration = self.duration
+        return self.frame_count / duration if duration > 0 else 0.0
+
+    def time_of(self, frame):
+        """Presentation time of a frame in seconds."""
+        return float(self.times[min(frame, len(self.times) - 1)])
+
+    def frame_at(self, seconds):
+        """Index of the frame whose presentation time is nearest to ``seconds``."""
+        pos = int(np.searchsorted(self.times, seconds))
+        if pos <= 0:
+            return 0
+        if pos >= len(self.times):
+            return len(self.times) - 1
+        before, after = self.times[pos - 1], self.times[pos]
+        return pos - 1 if seconds - before <= after - seconds else pos
+
+    def previous_keyframe(self, frame):
+        return self.keyframe_list[bisect_right(self.keyframe_list, frame) - 1]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.int64(INDEX_VERSION),
+                pts=self.pts,
+                keyframes=np.packbits(self.keyframes),
+                offsets=self.offsets,
+                time_base=np.array(self.time_base, dtype=np.int64),
+            )
+        # Replace atomically so a concurrent reader never sees a partial file
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                return None
+            pts = data["pts"]
+            keyframes = np.unpackbits(data["keyframes"], count=len(pts)).astype(bool)
+            return cls(pts, keyframes, data["offsets"], tuple(data["time_base"]))
+
+
+def _build_with_pyav(source, progress=None, cancel=None):
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        start = stream.start_time
+
+        entries = []
+        for packet in container.demux(stream):
+            # Flush packets carry no timestamp
+            if packet.pts is None:
+                continue
+            entries.append((packet.pts, packet.is_keyframe, packet.pos if packet.pos is not None else -1))
+
+            if len(entries) % INDEX_PROGRESS_PACKETS == 0:
+                if cancel is not None and cancel():
+                    return None
+                if progress is not None:
+                    progress(len(entries))
+
+        time_base = stream.time_base
+
+    if not entries:
+        return None
+
+    # Packets come in decode order, frames are numbered in presentation order
+    entries.sort(key=lambda entry: entry[0])
+    pts, keyframes, offsets = zip(*entries)
+    if start is None:
+        start = pts[0]
+    pts = np.asarray(pts, dtype=np.int64) - start
+
+    return VideoIndex(pts, keyframes, offsets, (time_base.numerator, time_base.denominator))
+
+
+def _build_with_opencv(source, progress=None, cancel=None):
+    key_prop = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+    if key_prop is None:
+        return None
+
+    # Raw stream mode hands out demuxed packets without decoding them; each one
+    # still reports its PTS (as CAP_PROP_POS_MSEC) and keyframe flag
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    entries = []
+    try:
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return None
+
+        while cap.grab():
+            entries.append((int(round(cap.get(cv2.CAP_PROP_POS_MSEC) * 1000)), bool(cap.get(key_prop))))
+
+            if len(entries) % INDEX_PROGRESS_PACKETS == 0:
+                if cancel is not None and cancel():
+                    return None
+                if progress is not None:
+                    progress(len(entries))
+    finally:
+        cap.release()
+
+    if not entries:
+        return None
+
+    # Packets come in decode order, frames are numbered in presentation order
+    entries.sort(key=lambda entry: entry[0])
+    pts, keyframes = zip(*entries)
+    offsets = np.full(len(pts), -1, dtype=np.int64)
+    return VideoIndex(pts, keyframes, offsets, (1, 1000000))
+
+
+def build_index(source, progress=None, cancel=None):
+    """Scan a video file once and return its VideoIndex, or None if it can't be read.
+
+    Only the container is demuxed, no frame is decoded. ``progress`` is called
+    with the number of packets scanned so far, and the scan stops (returning
+    None) as soon as ``cancel`` returns True.
+    """
+    if av is not None:
+        try:
+            index = _build_with_pyav(source, progress, cancel)
+            if index is not None:
+                return index
+        except (av.error.FFmpegError, IndexError):
+            # Not readable by PyAV (or no video stream), let OpenCV try
+            pass
+
+    if cancel is not None and cancel():
+        return None
+    return _build_with_opencv(source, progress, cancel)
+
+
+def load_index(source):
+    """Return the cached index for a video file, or None if there is no valid one."""
+    try:
+        path = index_path(source)
+    except OSError:
+        return None
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return VideoIndex.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def get_index(source, progress=None, cancel=None):
+    """Return the index for a video file, building and caching it on first use.
+
+    ``progress`` and ``cancel`` are passed to build_index; a cancelled build
+    returns None and caches nothing.
+    """
+    index = load_index(source)
+    if index is not None:
+        return index
+
+    index = build_index(source, progress, cancel)
+    if index is not None:
+        try:
+            index.save(index_path(source))
+        except OSError:
+            # A read-only cache only costs us the rescan next time
+            pass
+    return index
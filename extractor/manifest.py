@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .index import source_key
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def output_variant(output_format, encoder_params, sharpest=1, transform=None, scene=None, dedup=None):
+    """Short key for the settings that decide which bytes are written for a target.
+
+    ``transform`` is FrameTransform.options() when frames are transformed before encoding,
+    ``scene`` the (metric, threshold) that decide which frames a scene run saves and
+    ``dedup`` the (hash, distance) that decide which targets are skipped as duplicates.
+    """
+    key = [output_format, [int(param) for param in encoder_params], sharpest]
+    if transform is not None:
+        key.append(transform)
+    if scene is not None:
+        key.append(list(scene))
+    if dedup is not None:
+        key.append(["dedup"] + list(dedup))
+    text = json.dumps(key)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def manifest_entry(record, path, data):
+    """Manifest line for a written frame: ``record`` plus file name, size and SHA-1 of ``data``."""
+    return dict(record, file=os.path.basename(path), size=len(memoryview(data).cast("B")),
+                sha1=hashlib.sha1(data).hexdigest())
+
+
+class Manifest:
+    """Append-only JSON lines record of the frames written to an output folder.
+
+    Every run starts with a header line (time, source key, settings); every
+    written frame adds a line with its number, target and decoded frame index,
+    timestamp, file name, size, SHA-1 and output variant; a target skipped as a
+    near-duplicate adds a line without a file. Lines are flushed as
+    they are written, so after a crash the manifest lists exactly the frames
+    that made it to disk. Safe to append to from the writer threads.
+    """
+
+    def __init__(self, output_folder, source):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.output_folder = output_folder
+        self.source_key = source_key(source) if os.path.isfile(str(source)) else str(source)
+        self.lock = threading.Lock()
+        self.file = None
+
+    def completed(self, variant):
+        """Targets from this source and variant that are done, keyed by (number, target).
+
+        A target is done when its frame is still on disk unchanged, or when it
+        was skipped as a duplicate.
+        """
+        completed = {}
+        source = None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+
+                    if "run" in entry:
+                        source = entry.get("source")
+                    elif (source == self.source_key and entry.get("variant") == variant
+                          and entry.get("target") is not None):
+                        completed[(entry["number"], entry["target"])] = entry
+        except FileNotFoundError:
+            return completed
+
+        # Only frames whose file is still there and unchanged count as done
+        for key, entry in list(completed.items()):
+            if "skipped" not in entry and not self.intact(entry):
+                del completed[key]
+        return completed
+
+    def intact(self, entry):
+        """True if the entry's file has the size and SHA-1 recorded when it was written."""
+        path = os.path.join(self.output_folder, entry["file"])
+        try:
+            # The size rules out most damaged files without reading them
+            if os.path.getsize(path) != entry["size"]:
+                return False
+            with open(path, "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest() == entry.get("sha1")
+        except OSError:
+            return False
+
+    def start(self, **header):
+        """Open the manifest for appending and write this run's header line."""
+        self.file = open(self.path, "ab")
+
+        # Don't glue the header onto a line a crash left unfinished
+        if self.file.tell() > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write(b"\n")
+
+        self.append(dict(run=time.strftime("%Y-%m-%dT%H:%M:%S"), source=self.source_key, **header))
+
+    def append(self, entry):
+        with self.lock:
+            self.file.write(json.dumps(entry, default=str).encode("utf-8") + b"\n")
+            self.file.flush()
+
+    def add(self, record, path, data):
+        """Record a written frame; ``data`` is the encoded image."""
+        self.append(manifest_entry(record, path, data))
+
+    def skip(self, record, reason="duplicate"):
+        """Record a target that was deliberately not written."""
+        self.append(dict(record, skipped=reason))
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import queue
+
+from .decoder import open_decoder
+from .dedup import DuplicateFilter
+from .index import load_index
+from .manifest import manifest_entry
+from .planner import DecodePlanner, read_planned
+from .sharpness import read_sharpest
+from .timing import StageTimer
+from .transform import FrameTransform
+from .writer import FrameWriterPool, frame_filename
+
+# How often the parent checks for cancellation and dead workers, in seconds
+POLL_INTERVAL = 0.1
+
+
+def split_segments(frame_count, segments, planner):
+    """Split [0, frame_count) into up to ``segments`` ranges that each start on a keyframe."""
+    bounds = [0]
+    for i in range(1, segments):
+        start = planner.previous_keyframe(frame_count * i // segments)
+        if start > bounds[-1]:
+            bounds.append(start)
+    bounds.append(frame_count)
+    return list(zip(bounds, bounds[1:]))
+
+
+def assign_targets(numbered_targets, ranges):
+    """Distribute (number, frame_index) pairs over the segment ranges they fall into."""
+    assigned = [[] for _ in ranges]
+    segment = 0
+    for number, frame_index in sorted(numbered_targets, key=lambda target: target[1]):
+        while segment < len(ranges) - 1 and frame_index >= ranges[segment][1]:
+            segment += 1
+        assigned[segment].append((number, frame_index))
+    return assigned
+
+
+class ManifestRelay:
+    """Stands in for the parent's Manifest in a worker and forwards its lines as messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def add(self, record, path, data):
+        self.messages.put(("record", manifest_entry(record, path, data)))
+
+    def skip(self, record, reason="duplicate"):
+        self.messages.put(("record", dict(record, skipped=reason)))
+
+
+def extract_segment(job, messages, cancel):
+    """Worker process: decode one segment with its own capture and write its frames."""
+    written = 0
+    error = None
+    timer = StageTimer() if job["instrument"] else None
+    # Near-duplicates are only detected within a segment
+    duplicates = DuplicateFilter(**job["dedup"]) if job["dedup"] is not None else None
+    transform = FrameTransform(**job["transform"]) if job["transform"] is not None else None
+    video = open_decoder(job["source"], job["decoder"], job["decoder_threads"])
+
+    try:
+        if not video.isOpened():
+            raise OSError(f"Could not open video source {job['source']}")
+
+        # The parent already built the index, so this is only a cache load
+        index = load_index(job["source"]) if job["use_index"] else None
+        planner = DecodePlanner(job["keyframe_interval"], index=index, seek_backoff=job["seek_backoff"])
+
+        numbers = dict((frame_index, number) for number, frame_index in job["targets"])
+        targets = [frame_index for _, frame_index in job["targets"]]
+
+        if job["sharpest"] > 1:
+            frames = read_sharpest(video, targets, job["sharpest"], planner, timer)
+        else:
+            frames = ((target, target, frame) for target, frame in read_planned(video, targets, planner, timer))
+
+        manifest = ManifestRelay(messages) if job["manifest"] else None
+        with FrameWriterPool(job["writer_threads"], timer=timer, manifest=manifest) as writer:
+            if transform is not None:
+                transform.reserve(writer.max_pending + writer.workers + 1)
+
+            for target, frame_index, frame in frames:
+                if transform is not None:
+                    frame = transform.apply(frame)
+
+                timestamp = planner.time_of(frame_index, job["fps"])
+                record = {"number": numbers[target], "target": target, "frame": frame_index,
+                          "pts": round(timestamp, 6), "variant": job["variant"]}
+
+                if duplicates is not None and duplicates.is_duplicate(frame):
+                    if timer is not None:
+                        timer.count("duplicates")
+                    # Recorded so a rerun doesn't evaluate the target again
+                    if manifest is not None:
+                        manifest.skip(record)
+                else:
+                    if duplicates is not None:
+                        record["hash"] = duplicates.last_hash
+                    filename = frame_filename(numbers[target], timestamp, job["output_format"])
+                    writer.submit(os.path.join(job["output_folder"], filename), frame, job["encoder_params"], record)
+                    written += 1
+
+                messages.put(("progress", job["segment"], 1))
+
+                if cancel.is_set():
+                    break
+    except Exception as e:
+        error = str(e)
+    finally:
+        video.release()
+
+    timing = timer.state() if timer is not None else None
+    skipped = duplicates.skipped if duplicates is not None else 0
+    messages.put(("done", job["segment"], written, skipped, error, timing))
+
+
+def run_parallel(source, numbered_targets, frame_count, planner, fps, output_folder, output_format,
+                 processes, encoder_params=(), writer_threads=1, progress=None, cancel=None, timer=None, duplicates=None,
+                 sharpest=1, manifest=None, variant=None, transform=None, decoder="opencv", decoder_threads=0):
+    """Extract frames with one decoding process per keyframe-aligned segment of the video.
+
+    ``numbered_targets`` are (output number, frame index) pairs, so file names are
+    the same as a sequential run. ``progress`` is called in this process with the
+    number of frames written so far; ``cancel`` is polled and stops all workers
+    when it returns True. Worker timings are merged into ``timer`` if given.
+    With a DuplicateFilter in ``duplicates``, each worker skips near-duplicates
+    with the same settings and the skip counts are added to it. With
+    ``sharpest`` > 1 the sharpest of that many frames from each target is saved.
+    Written frames are added to ``manifest`` (under ``variant``) if given.
+    Each worker decodes with the ``decoder`` backend and ``decoder_threads``,
+    and applies its own copy of ``transform`` (a FrameTransform) if given.
+    Returns the number of frames written.
+    """
+    ranges = split_segments(frame_count, processes, planner)
+    assigned = assign_targets(numbered_targets, ranges)
+
+    # Spawn gives every worker a clean interpreter, without the GUI's threads
+    context = multiprocessing.get_context("spawn")
+    messages = context.Queue()
+    cancel_event = context.Event()
+
+    workers = {}
+    for segment, targets in enumerate(assigned):
+        if not targets:
+            continue
+        job = {
+            "segment": segment,
+            "source": source,
+            "targets": targets,
+            "use_index": planner.index is not None,
+            "keyframe_interval": planner.keyframe_interval,
+            "seek_backoff": planner.seek_backoff,
+            "fps": fps,
+            "output_folder": output_folder,
+            "output_format": output_format,
+            "encoder_params": list(encoder_params),
+            "writer_threads": writer_threads,
+            "instrument": timer is not None,
+            "dedup": duplicates.options() if duplicates is not None else None,
+            "sharpest": sharpest,
+            "manifest": manifest is not None,
+            "variant": variant,
+            "transform": transform.options() if transform is not None else None,
+            "decoder": decoder,
+            "decoder_threads": decoder_threads,
+        }
+        worker = context.Process(target=extract_segment, args=(job, messages, cancel_event))
+        worker.daemon = True
+        worker.start()
+        workers[segment] = worker
+
+    done = 0
+    written = 0
+    errors = []
+    pending = set(workers)
+
+    while pending:
+        if cancel is not None and cancel():
+            cancel_event.set()
+
+        try:
+            message = messages.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            # A worker that died without reporting (e.g. a decoder crash) never will
+            for segment in list(pending):
+                exitcode = workers[segment].exitcode
+                if exitcode is not None and exitcode != 0:
+                    pending.discard(segment)
+                    errors.append(f"segment {segment} exited with code {exitcode}")
+            continue
+
+        if message[0] == "progress":
+            done += message[2]
+            if progress is not None:
+                progress(done)
+        elif message[0] == "record":
+            manifest.append(message[1])
+        else:
+            _, segment, count, skipped, error, timing = message
+            pending.discard(segment)
+            written += count
+            if duplicates is not None:
+                duplicates.skipped += skipped
+            if timing is not None:
+                timer.merge(timing)
+            if error:
+                errors.append(f"segment {segment}: {error}")
+
+    for worker in workers.values():
+        worker.join()
+
+    if errors:
+        raise RuntimeError("Parallel extraction failed: " + "; ".join(errors))
+
+    return written
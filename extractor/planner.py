@@ -0,0 +1,186 @@
+import time
+
+import cv2
+
+# Assumed keyframe distance when the container can't be probed (x264/x265 default)
+DEFAULT_KEYFRAME_INTERVAL = 250
+
+# Number of packets scanned when estimating the keyframe distance
+PROBE_PACKETS = 600
+
+# Fixed cost of a seek (decoder flush + container lookup), in decoded frames
+SEEK_OVERHEAD_FRAMES = 4
+
+# OpenCV's FFmpeg backend seeks to this many frames before the requested one and
+# decodes forward from the keyframe before that, so a target less than this far
+# past a keyframe costs the whole previous GOP as well
+SEEK_BACKOFF_FRAMES = 16
+
+# Attempts at landing on or before a target before rewinding to the start
+SEEK_RETRIES = 3
+
+SEEK = "seek"
+GRAB = "grab"
+
+
+def estimate_keyframe_interval(source, max_packets=PROBE_PACKETS):
+    """Estimate the keyframe distance of a video file from its packet flags."""
+    key_prop = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+    if key_prop is None:
+        return DEFAULT_KEYFRAME_INTERVAL
+
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        return DEFAULT_KEYFRAME_INTERVAL
+
+    keyframes = []
+    packets = 0
+    try:
+        # Raw stream mode hands out demuxed packets without decoding them
+        if not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return DEFAULT_KEYFRAME_INTERVAL
+
+        while packets < max_packets and cap.grab():
+            if cap.get(key_prop):
+                keyframes.append(packets)
+            packets += 1
+    finally:
+        cap.release()
+
+    if len(keyframes) >= 2:
+        gaps = sorted(b - a for a, b in zip(keyframes, keyframes[1:]))
+        return max(gaps[len(gaps) // 2], 1)
+
+    if keyframes and packets == max_packets:
+        # Only one keyframe in the probe window, so the GOP is at least that long
+        return max(packets - keyframes[0], DEFAULT_KEYFRAME_INTERVAL)
+
+    return DEFAULT_KEYFRAME_INTERVAL
+
+
+class DecodePlanner:
+    """Chooses between sequential grab() skipping and seeking for each target frame.
+
+    A seek lands on the keyframe before the target and decodes forward from
+    there, so it only pays off when the target is further away than that.
+    Keyframes are taken from ``index`` (a VideoIndex) when given, otherwise
+    they are assumed to sit on multiples of ``keyframe_interval``.
+    ``seek_backoff`` is how many frames before the target the decoder really
+    seeks to (SEEK_BACKOFF_FRAMES for OpenCV, 0 for PyAV).
+    """
+
+    def __init__(self, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL,
+                 seek_overhead=SEEK_OVERHEAD_FRAMES, index=None, seek_backoff=SEEK_BACKOFF_FRAMES):
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+        self.seek_overhead = seek_overhead
+        self.index = index
+        self.seek_backoff = seek_backoff
+
+    def previous_keyframe(self, frame):
+        if self.index is not None:
+            return self.index.previous_keyframe(frame)
+        return frame - frame % self.keyframe_interval
+
+    def seek_start(self, target):
+        """The keyframe a seek to ``target`` starts decoding from."""
+        return self.previous_keyframe(max(target - self.seek_backoff, 0))
+
+    def time_of(self, frame, fps):
+        """Presentation time of a frame in seconds, exact when an index is available."""
+        if self.index is not None:
+            return self.index.time_of(frame)
+        return frame / fps
+
+    def plan(self, targets, position=0):
+        """Yield (frame_index, action) for every target, in order.
+
+        ``position`` is the next frame the decoder would return from read().
+        """
+        for target in targets:
+            gap = target - position
+            keyframe = self.seek_start(target)
+
+            if gap < 0:
+                action = SEEK
+            elif keyframe <= position:
+                # Same GOP: a seek would decode at least as many frames
+                action = GRAB
+            elif gap <= target - keyframe + self.seek_overhead:
+                action = GRAB
+            else:
+                action = SEEK
+
+            yield target, action
+            position = target + 1
+
+
+def seek_indexed(video, index, target):
+    """Seek to ``target`` and return the next frame grab() will return.
+
+    The seek asks for the target itself and lets the decoder find its
+    keyframe: asking for the keyframe would make OpenCV back off past it and
+    decode the whole GOP before it too. OpenCV converts seek times to frame
+    numbers with the average frame rate, so on variable frame rate files it
+    lands off target. The frame it actually landed on is looked up in the
+    index by timestamp, and the seek is retried earlier if it overshot.
+    """
+    seek_to = target
+
+    for _ in range(SEEK_RETRIES):
+        video.set(cv2.CAP_PROP_POS_MSEC, index.time_of(seek_to) * 1000)
+        if not video.grab():
+            break
+
+        landed = index.frame_at(video.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+        if landed <= target:
+            return landed + 1
+
+        seek_to = max(seek_to - (landed - target), 0)
+
+    # Rewinding to the start is always exact
+    video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    return 0
+
+
+def read_planned(video, targets, planner, timer=None):
+    """Yield (frame_index, frame) for each target frame of an opened capture.
+
+    Frames that are skipped over are only grabbed, never retrieved, so they
+    don't pay for colour conversion. Stops at the first frame that can't be read.
+    Seek and read times and skipped frames are recorded when a StageTimer is given.
+    """
+    # Next frame grab() will return
+    position = 0
+
+    for target, action in planner.plan(targets, position):
+        if action == SEEK:
+            if timer is not None:
+                start = time.perf_counter()
+
+            if planner.index is not None:
+                position = seek_indexed(video, planner.index, target)
+            else:
+                video.set(cv2.CAP_PROP_POS_FRAMES, target)
+                position = target
+
+            if timer is not None:
+                timer.add("seek", time.perf_counter() - start)
+
+        if timer is not None:
+            start = time.perf_counter()
+            timer.count("skipped", max(target - position, 0))
+
+        # Grab forward; the last grab lands on the target
+        while position <= target:
+            if not video.grab():
+                return
+            position += 1
+
+        ret, frame = video.retrieve()
+        if not ret:
+            return
+
+        if timer is not None:
+            timer.add("read", time.perf_counter() - start)
+
+        yield target, frame
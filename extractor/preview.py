@@ -0,0 +1,318 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .decoder import open_decoder
+from .probe import probe_video
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# Frame rate assumed when a camera or file doesn't report a usable one
+DEFAULT_PREVIEW_FPS = 30
+
+# Sources at least this many times larger than the canvas get a proxy preview
+PROXY_MIN_SCALE = 2.0
+
+# Display rate of a proxy preview; frames in between are never converted
+PROXY_FPS = 15
+
+# Seconds a proxy preview may fall behind before its clock is re-anchored
+PROXY_MAX_LAG = 0.5
+
+
+def fit_size(width, height, target_width, target_height):
+    """Largest size with the frame's aspect ratio that fits inside the target size."""
+    aspect_ratio = width / height
+    if aspect_ratio > target_width / target_height:
+        # Width-constrained
+        return target_width, max(int(target_width / aspect_ratio), 1)
+    # Height-constrained
+    return max(int(target_height * aspect_ratio), 1), target_height
+
+
+class PPMEncoder:
+    """Turns BGR (or grayscale) frames into binary PPM/PGM bytes for tkinter.PhotoImage.
+
+    Resizing and colour conversion write straight into buffers that are reused
+    from frame to frame, the pixel buffer sitting right after the PPM header,
+    so no PIL images or intermediate arrays are created. The only per-frame
+    allocation is the immutable bytes object Tk needs, which also makes the
+    result safe to hand to another thread.
+    """
+
+    def __init__(self):
+        self.layout = None
+        self.buffer = None
+        self.pixels = None
+        self.resized = None
+
+    def allocate(self, width, height, channels):
+        magic = b"P6" if channels == 3 else b"P5"
+        header = magic + b"\n%d %d\n255\n" % (width, height)
+        shape = (height, width, channels) if channels == 3 else (height, width)
+
+        self.buffer = bytearray(len(header) + width * height * channels)
+        self.buffer[:len(header)] = header
+        self.pixels = np.frombuffer(self.buffer, dtype=np.uint8, offset=len(header)).reshape(shape)
+        self.resized = np.empty(shape, dtype=np.uint8)
+        self.layout = (width, height, channels)
+
+    def encode(self, frame, width, height):
+        channels = 3 if frame.ndim == 3 else 1
+        if self.layout != (width, height, channels):
+            self.allocate(width, height, channels)
+
+        if frame.shape[1] == width and frame.shape[0] == height:
+            source = frame
+        else:
+            source = cv2.resize(frame, (width, height), dst=self.resized, interpolation=cv2.INTER_AREA)
+
+        if channels == 3:
+            cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.pixels)
+        else:
+            self.pixels[...] = source
+
+        return bytes(self.buffer)
+
+
+def choose_proxy(frame_size, display_size, is_camera=False):
+    """Pick the preview mode for a source shown on a canvas of ``display_size``.
+
+    Returns None for a normal full-resolution preview, "reduced" to let PyAV
+    scale straight from the decoder's output to the display size, or "skip"
+    to cap the display rate with grab() when PyAV can't be used.
+    """
+    if not frame_size or not display_size or min(frame_size) <= 0 or min(display_size) <= 0:
+        return None
+
+    scale = max(frame_size[0] / display_size[0], frame_size[1] / display_size[1])
+    if scale < PROXY_MIN_SCALE:
+        return None
+    return "reduced" if av is not None and not is_camera else "skip"
+
+
+class FrameSlot:
+    """Single-slot buffer that only ever holds the most recent frame.
+
+    The producer overwrites the slot; a frame that is replaced before the
+    consumer took it is counted as dropped instead of queueing up as lag.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+        self.sequence = 0
+        self.taken_sequence = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        with self.lock:
+            if self.sequence > self.taken_sequence:
+                self.dropped += 1
+            self.frame = frame
+            self.sequence += 1
+
+    def take(self):
+        """Return the newest frame if it hasn't been taken yet, otherwise None."""
+        with self.lock:
+            if self.sequence == self.taken_sequence:
+                return None
+            self.taken_sequence = self.sequence
+            return self.frame
+
+
+class PreviewDecoder(threading.Thread):
+    """Decodes a video file or camera for the preview on a background thread.
+
+    Files are paced to the source's real frame rate and loop at the end; when
+    decoding falls behind, late frames are skipped with grab() rather than
+    decoded into a backlog. Each decoded frame goes through ``prepare`` (run
+    on this thread, e.g. resize and colour conversion) into ``slot``. The
+    thread makes no Tk calls; failures are reported through ``error``.
+
+    With ``display_size`` (a callable returning the canvas size) a source much
+    larger than the canvas is previewed through a proxy (see choose_proxy),
+    capped at PROXY_FPS and, when PyAV is available, scaled to the canvas
+    during pixel format conversion instead of after a full-size BGR decode.
+    Other previews decode with the ``decoder`` backend (see open_decoder).
+    """
+
+    def __init__(self, source, is_camera, prepare=None, display_size=None, decoder="opencv"):
+        super().__init__(name="preview-decoder")
+        self.daemon = True
+        self.source = source
+        self.is_camera = is_camera
+        self.prepare = prepare
+        self.display_size = display_size
+        self.decoder = decoder
+        self.slot = FrameSlot()
+        self.stop_event = threading.Event()
+
+        self.fps = None
+        self.frame_size = None
+        self.error = None
+        self.proxy = None
+        self.late_skipped = 0
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        if timeout is not None and self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        # File properties come from the probe cache, so a reduced proxy never opens OpenCV at all
+        info = None if self.is_camera else probe_video(self.source)
+        if info is not None:
+            self.fps = info.fps or DEFAULT_PREVIEW_FPS
+            self.frame_size = info.frame_size
+
+            if self.display_size is not None:
+                self.proxy = choose_proxy(self.frame_size, self.display_size(), self.is_camera)
+
+            if self.proxy == "reduced":
+                try:
+                    self.decode_reduced(self.fps)
+                    return
+                except (av.error.FFmpegError, IndexError):
+                    # PyAV can't handle this file; cap the display rate with OpenCV instead
+                    self.proxy = "skip"
+
+        cap = open_decoder(self.source, self.decoder)
+        try:
+            if not cap.isOpened():
+                self.error = "Could not open video source."
+                return
+
+            if info is None:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                if not fps or fps < 0.1 or fps > 1000:
+                    fps = DEFAULT_PREVIEW_FPS
+                self.fps = fps
+
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                if width > 0 and height > 0:
+                    self.frame_size = (width, height)
+
+                if self.display_size is not None:
+                    self.proxy = choose_proxy(self.frame_size, self.display_size(), self.is_camera)
+
+            self.decode_loop(cap, 1.0 / self.fps)
+        finally:
+            cap.release()
+
+    def decode_loop(self, cap, period):
+        start = time.perf_counter()
+        played = 0  # frames since the start of this pass through the file
+
+        # Proxy previews only show every stride-th frame; grab() skips the rest undecoded to BGR
+        stride = max(round(1 / (period * PROXY_FPS)), 1) if self.proxy == "skip" else 1
+
+        while not self.stop_event.is_set():
+            if not self.is_camera:
+                due = start + played * period
+                now = time.perf_counter()
+                if due > now:
+                    # Ahead of the source clock: wait, but wake up at once on stop
+                    if self.stop_event.wait(due - now):
+                        break
+                else:
+                    # Behind: skip the frames that are already late without decoding them fully
+                    behind = int((now - due) / period)
+                    for _ in range(behind):
+                        if not cap.grab():
+                            break
+                        played += 1
+                        self.late_skipped += 1
+
+            ret, frame = cap.read()
+            if not ret:
+                if self.is_camera or played == 0:
+                    if played == 0:
+                        self.error = "Could not read from video source."
+                    break
+
+                # Loop video files from the beginning
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                start = time.perf_counter()
+                played = 0
+                continue
+
+            played += 1
+            if self.frame_size is None:
+                self.frame_size = (frame.shape[1], frame.shape[0])
+
+            if self.prepare is not None:
+                frame = self.prepare(frame)
+            self.slot.put(frame)
+
+            for _ in range(stride - 1):
+                if not cap.grab():
+                    break
+                played += 1
+
+    def decode_reduced(self, fps):
+        """Proxy preview of a file through PyAV, converting only displayed frames at display size."""
+        display_period = max(1.0 / fps, 1.0 / PROXY_FPS)
+
+        with av.open(self.source) as container:
+            stream = container.streams.video[0]
+            width = stream.codec_context.width
+            height = stream.codec_context.height
+
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                first_time = None
+                next_display = 0.0
+                decoded = 0
+
+                for frame in container.decode(stream):
+                    if self.stop_event.is_set():
+                        return
+                    decoded += 1
+
+                    # Position in this pass, from the frame's own timestamp where there is one
+                    if frame.time is None:
+                        position = (decoded - 1) / fps
+                    else:
+                        if first_time is None:
+                            first_time = frame.time
+                        position = frame.time - first_time
+
+                    # Between display ticks: decoded, but never converted
+                    if position < next_display:
+                        continue
+                    next_display = position + display_period - 0.5 / fps
+
+                    due = start + position
+                    now = time.perf_counter()
+                    if due > now:
+                        if self.stop_event.wait(due - now):
+                            return
+                    elif now - due > PROXY_MAX_LAG:
+                        # Decoding can't keep up: show this frame and carry on from here
+                        start = now - position
+                    elif now - due > display_period:
+                        self.late_skipped += 1
+                        continue
+
+                    # Scale during the YUV -> BGR conversion, so no full-size BGR frame is made
+                    target_width, target_height = fit_size(width, height, *self.display_size())
+                    image = frame.to_ndarray(width=target_width, height=target_height,
+                                             format="bgr24", interpolation="AREA")
+
+                    if self.prepare is not None:
+                        image = self.prepare(image)
+                    self.slot.put(image)
+
+                if decoded == 0:
+                    self.error = "Could not read from video source."
+                    return
+
+                # Loop video files from the beginning
+                container.seek(0)
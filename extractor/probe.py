@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+import cv2
+
+from .index import cache_dir, load_index, source_key
+
+PROBE_VERSION = 1
+
+# Containers whose reported frame count is usually estimated from duration x fps
+ESTIMATED_COUNT_CONTAINERS = (".mkv", ".webm", ".ts", ".m2ts", ".mts", ".flv", ".ogv")
+
+
+@dataclass
+class VideoInfo:
+    width: int
+    height: int
+    fps: float  # as reported by OpenCV; 0.0 when unknown
+    frame_count: int
+    frame_count_verified: bool  # counted from the index or the packets, not taken from the header
+
+    @property
+    def duration(self):
+        return self.frame_count / self.fps if self.fps > 0 else 0.0
+
+    @property
+    def frame_size(self):
+        if self.width > 0 and self.height > 0:
+            return self.width, self.height
+        return None
+
+
+def probe_path(source):
+    return os.path.join(os.path.dirname(cache_dir()), "probe", source_key(source) + ".json")
+
+
+def count_packets(cap):
+    """Count the video packets of a freshly opened capture without decoding them."""
+    # Raw stream mode hands out demuxed packets only
+    if not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        return None
+
+    packets = 0
+    while cap.grab():
+        packets += 1
+    return packets
+
+
+def frame_count_estimated(source, info):
+    """True when the header's frame count is missing or likely estimated from duration x fps."""
+    if info.frame_count_verified:
+        return False
+    return info.frame_count == 0 or os.path.splitext(source)[1].lower() in ESTIMATED_COUNT_CONTAINERS
+
+
+def read_video_info(source):
+    """Open a video file once and return its VideoInfo, or None if it can't be opened.
+
+    Only the header is read, so this is quick even for huge files on slow
+    storage; an estimated frame count is left unverified (see count_frames).
+    """
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    try:
+        if not cap.isOpened():
+            return None
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        info = VideoInfo(
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            fps=fps if 0.1 <= fps <= 1000 else 0.0,
+            frame_count=max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0),
+            frame_count_verified=False
+        )
+
+        # A cached frame index already has the exact count
+        index = load_index(source)
+        if index is not None:
+            info.frame_count = index.frame_count
+            info.frame_count_verified = True
+        return info
+    finally:
+        cap.release()
+
+
+class ProbeCache:
+    """Video properties by file, kept in memory and in the on-disk cache.
+
+    Entries are keyed by absolute path, size and modification time (the same
+    key as the frame index), so an edited or replaced file is probed again.
+    Safe to use from the preview and extraction threads.
+    """
+
+    def __init__(self, use_disk=True):
+        self.use_disk = use_disk
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, source):
+        """VideoInfo for a video file, probing it only on first use; None if it can't be read."""
+        try:
+            key = source_key(source)
+        except (OSError, TypeError):
+            return None
+
+        with self.lock:
+            info = self.entries.get(key)
+        if info is not None:
+            return info
+
+        info = self.load(source) if self.use_disk else None
+        if info is None:
+            info = read_video_info(source)
+            if info is None:
+                return None
+            if self.use_disk:
+                self.save(source, info)
+
+        with self.lock:
+            self.entries[key] = info
+        return info
+
+    def load(self, source):
+        try:
+            with open(probe_path(source), encoding="utf-8") as f:
+                data = json.load(f)
+            if data.pop("version", None) != PROBE_VERSION:
+                return None
+            return VideoInfo(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, source, info):
+        try:
+            path = probe_path(source)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(dict(asdict(info), version=PROBE_VERSION), f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A read-only cache only costs us the probe next time
+            pass
+
+    def verified(self, source, frame_count):
+        """Record an exact frame count found elsewhere, e.g. by building the frame index."""
+        info = self.get(source)
+        if info is None or (info.frame_count_verified and info.frame_count == frame_count):
+            return
+
+        info = VideoInfo(**dict(asdict(info), frame_count=frame_count, frame_count_verified=True))
+        if self.use_disk:
+            self.save(source, info)
+        with self.lock:
+            self.entries[source_key(source)] = info
+
+    def count_frames(self, source):
+        """VideoInfo with an exact frame count, counting the packets when the header's is estimated.
+
+        Counting demuxes the whole file, so call this off the UI thread.
+        """
+        info = self.get(source)
+        if info is None or not frame_count_estimated(source, info):
+            return info
+
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        try:
+            packets = count_packets(cap) if cap.isOpened() else None
+        finally:
+            cap.release()
+
+        if packets:
+            self.verified(source, packets)
+        return self.get(source)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Shared by the GUI, the preview and the extractors
+probe_cache = ProbeCache()
+
+
+def probe_video(source):
+    """Cached VideoInfo for a video file, or None if it can't be opened."""
+    return probe_cache.get(source)
+
+
+def count_frames(source):
+    """Cached VideoInfo with a counted frame count where the header's is estimated; slow the first time."""
+    return probe_cache.count_frames(source)
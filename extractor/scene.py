@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+# Width of the copy frames are scored on; the height keeps the aspect ratio
+SCENE_WIDTH = 160
+
+# Frames scored per second of video; the frames in between are only grabbed
+SCENE_SAMPLE_FPS = 10
+
+# Scoring metrics and their default thresholds; both scores run from 0 to 1
+SCENE_METRICS = {"histogram": 0.3, "mad": 0.1}
+
+# Luma histogram bins for the "histogram" metric (256 levels >> 2)
+HISTOGRAM_SHIFT = 2
+
+
+class SceneDetector:
+    """Scores each frame against the previous one on a small grayscale copy.
+
+    "histogram" is the total variation distance between luma histograms,
+    which ignores motion inside a shot; "mad" is the mean absolute pixel
+    difference over 255, which also catches cuts between shots with similar
+    tones. Buffers are allocated for the first frame and reused afterwards.
+    """
+
+    def __init__(self, metric="histogram", threshold=None, width=SCENE_WIDTH):
+        if metric not in SCENE_METRICS:
+            raise ValueError(f"Unknown scene metric: {metric}")
+
+        self.metric = metric
+        self.threshold = SCENE_METRICS[metric] if threshold is None else threshold
+        self.width = width
+        self.last_score = 0.0
+
+        self.shape = None
+        self.small = None
+        self.current = None
+        self.previous = None
+        self.difference = None
+        self.previous_histogram = None
+
+    def allocate(self, frame):
+        height, width = frame.shape[:2]
+        small_width = min(self.width, width)
+        small_height = max(round(height * small_width / width), 1)
+
+        self.shape = frame.shape
+        self.small = np.empty((small_height, small_width) + frame.shape[2:], dtype=np.uint8)
+        self.current = np.empty((small_height, small_width), dtype=np.uint8)
+        self.previous = np.empty_like(self.current)
+        self.difference = np.empty(self.current.shape, dtype=np.int16)
+        self.previous_histogram = None
+
+    def update(self, frame):
+        """Score ``frame`` and return True when it starts a new scene; the first frame always does."""
+        first = self.shape != frame.shape
+        if first:
+            self.allocate(frame)
+
+        height, width = self.current.shape
+        if frame.ndim == 3:
+            cv2.resize(frame, (width, height), dst=self.small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.current)
+        else:
+            cv2.resize(frame, (width, height), dst=self.current, interpolation=cv2.INTER_AREA)
+
+        if self.metric == "histogram":
+            histogram = np.bincount((self.current >> HISTOGRAM_SHIFT).ravel(),
+                                    minlength=256 >> HISTOGRAM_SHIFT) / self.current.size
+            if not first:
+                self.last_score = float(np.abs(histogram - self.previous_histogram).sum()) / 2
+            self.previous_histogram = histogram
+        elif not first:
+            np.subtract(self.current, self.previous, out=self.difference, dtype=np.int16)
+            np.abs(self.difference, out=self.difference)
+            self.last_score = float(self.difference.mean()) / 255
+
+        # The frame just scored is the reference for the next one
+        self.current, self.previous = self.previous, self.current
+
+        if first:
+            self.last_score = 1.0
+            return True
+        return self.last_score >= self.threshold
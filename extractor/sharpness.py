@@ -0,0 +1,67 @@
+import time
+
+import cv2
+
+from .planner import read_planned
+
+# Width of the copy frames are scored on; the height keeps the aspect ratio
+SHARPNESS_WIDTH = 320
+
+
+def sharpness(frame, width=SHARPNESS_WIDTH):
+    """Variance of the Laplacian of a downscaled grayscale copy; higher is sharper."""
+    height = frame.shape[0] * width // frame.shape[1]
+    if width < frame.shape[1] and height > 0:
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(frame, cv2.CV_32F).var())
+
+
+def candidate_windows(targets, candidates):
+    """Consecutive candidate frames for each target, stopping short of the next target."""
+    windows = []
+    for i, target in enumerate(targets):
+        end = target + candidates
+        if i + 1 < len(targets):
+            end = min(end, targets[i + 1])
+        windows.append(range(target, max(end, target + 1)))
+    return windows
+
+
+def read_sharpest(video, targets, candidates, planner, timer=None):
+    """Yield (target, frame_index, frame) with the sharpest of ``candidates`` frames from each target on.
+
+    The candidates of a window are consecutive, so after the planner's seek
+    to the first one the rest are decoded sequentially. Scoring time goes to
+    the "sharpness" stage of ``timer`` if given.
+    """
+    windows = candidate_windows(targets, candidates)
+    owner = {}
+    for window, frames in enumerate(windows):
+        for frame_index in frames:
+            owner[frame_index] = window
+
+    current = None
+    best = None  # (score, frame_index, frame) of the current window
+
+    for frame_index, frame in read_planned(video, [f for frames in windows for f in frames], planner, timer):
+        window = owner[frame_index]
+        if window != current:
+            if best is not None:
+                yield targets[current], best[1], best[2]
+            current = window
+            best = None
+
+        if timer is not None:
+            start = time.perf_counter()
+        score = sharpness(frame)
+        if timer is not None:
+            timer.add("sharpness", time.perf_counter() - start)
+
+        if best is None or score > best[0]:
+            best = (score, frame_index, frame)
+
+    # The last window, or one cut short by the end of the file
+    if best is not None:
+        yield targets[current], best[1], best[2]
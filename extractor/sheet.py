@@ -0,0 +1,93 @@
+import os
+
+import cv2
+import numpy as np
+
+# Pixels between tiles and around the edge of a sheet
+SHEET_SPACING = 4
+SHEET_BACKGROUND = (32, 32, 32)
+
+
+class ContactSheetBuilder:
+    """Composes frames into tiled contact sheets as they are extracted.
+
+    Each sheet is a canvas allocated once when its first frame arrives; frames
+    are resized straight into their tile and labelled there, and the full
+    sheet is handed to ``writer`` (a FrameWriterPool) as a single image. The
+    tile height follows the aspect ratio of the first frame. Call ``close``
+    to write a last, partly filled sheet.
+    """
+
+    def __init__(self, output_folder, output_format, writer, columns=5, rows=5, tile_width=320,
+                 labels=True, params=()):
+        self.output_folder = output_folder
+        self.output_format = output_format
+        self.writer = writer
+        self.columns = max(int(columns), 1)
+        self.rows = max(int(rows), 1)
+        self.tile_width = max(int(tile_width), 16)
+        self.tile_height = None
+        self.labels = labels
+        self.params = params
+
+        self.canvas = None
+        self.filled = 0
+        self.sheets_written = 0
+
+    def sheet_path(self, sheet_number):
+        return os.path.join(self.output_folder, f"sheet_{sheet_number:04d}.{self.output_format}")
+
+    def tile_origin(self, slot):
+        row, column = divmod(slot, self.columns)
+        return (SHEET_SPACING + column * (self.tile_width + SHEET_SPACING),
+                SHEET_SPACING + row * (self.tile_height + SHEET_SPACING))
+
+    def new_canvas(self, frame):
+        if self.tile_height is None:
+            height, width = frame.shape[:2]
+            self.tile_height = max(round(self.tile_width * height / width), 1)
+
+        canvas_width = self.columns * (self.tile_width + SHEET_SPACING) + SHEET_SPACING
+        canvas_height = self.rows * (self.tile_height + SHEET_SPACING) + SHEET_SPACING
+        self.canvas = np.empty((canvas_height, canvas_width, 3), dtype=np.uint8)
+        self.canvas[:] = SHEET_BACKGROUND
+
+    def add(self, frame, label=None):
+        """Place a frame on the current sheet and return the path that sheet will be written to."""
+        if self.canvas is None:
+            self.new_canvas(frame)
+
+        x, y = self.tile_origin(self.filled)
+        tile = self.canvas[y:y + self.tile_height, x:x + self.tile_width]
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        cv2.resize(frame, (self.tile_width, self.tile_height), dst=tile, interpolation=cv2.INTER_AREA)
+
+        if self.labels and label:
+            # Dark outline keeps the label readable on bright frames
+            position = (6, self.tile_height - 8)
+            cv2.putText(tile, label, position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3, cv2.LINE_AA)
+            cv2.putText(tile, label, position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+
+        path = self.sheet_path(self.sheets_written)
+        self.filled += 1
+        if self.filled == self.columns * self.rows:
+            self.flush()
+        return path
+
+    def flush(self):
+        """Write the current sheet, cropped to the rows in use."""
+        if self.canvas is None or self.filled == 0:
+            return
+
+        used_rows = -(-self.filled // self.columns)
+        height = used_rows * (self.tile_height + SHEET_SPACING) + SHEET_SPACING
+
+        # The writer owns the canvas from here on; the next sheet gets a new one
+        self.writer.submit(self.sheet_path(self.sheets_written), self.canvas[:height], self.params)
+        self.sheets_written += 1
+        self.canvas = None
+        self.filled = 0
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,158 @@
+import csv
+import json
+import random
+import threading
+import time
+from array import array
+
+# Stages in report order; other stage names are accepted and listed after these
+STAGES = ("seek", "read", "encode", "write")
+
+# Samples kept per stage for percentiles; totals and counts are always exact
+MAX_SAMPLES = 100000
+
+# Minimum seconds between refreshes of the live summary
+LIVE_INTERVAL = 0.5
+
+
+class StageTimer:
+    """Opt-in timing of the extraction hot paths.
+
+    Hot paths take ``timer=None`` and only call into the timer when one is
+    given, so with instrumentation off the cost is an ``is not None`` check
+    per stage. Percentiles come from a bounded reservoir sample per stage.
+    Safe to share between the decode thread and the writer threads.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.totals = {}
+        self.counts = {}
+        self.maxima = {}
+        self.samples = {}
+        self.counters = {"skipped": 0, "dropped": 0}
+        self.lock = threading.Lock()
+        self.random = random.Random(0)
+        self.started = time.perf_counter()
+
+        self.live_text = ""
+        self.live_updated = 0.0
+
+        for stage in STAGES:
+            self.add_stage(stage)
+
+    def add_stage(self, stage):
+        self.totals[stage] = 0.0
+        self.counts[stage] = 0
+        self.maxima[stage] = 0.0
+        self.samples[stage] = array("d")
+
+    def add(self, stage, seconds):
+        with self.lock:
+            if stage not in self.totals:
+                self.add_stage(stage)
+
+            self.totals[stage] += seconds
+            self.counts[stage] += 1
+            if seconds > self.maxima[stage]:
+                self.maxima[stage] = seconds
+
+            samples = self.samples[stage]
+            if len(samples) < self.max_samples:
+                samples.append(seconds)
+            else:
+                # Reservoir sampling keeps a uniform sample of every duration seen
+                slot = self.random.randrange(self.counts[stage])
+                if slot < self.max_samples:
+                    samples[slot] = seconds
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def state(self):
+        """Picklable snapshot, for merging timings from worker processes."""
+        with self.lock:
+            return {
+                "totals": dict(self.totals),
+                "counts": dict(self.counts),
+                "maxima": dict(self.maxima),
+                "samples": {stage: samples.tolist() for stage, samples in self.samples.items()},
+                "counters": dict(self.counters),
+            }
+
+    def merge(self, state):
+        with self.lock:
+            for stage, total in state["totals"].items():
+                if stage not in self.totals:
+                    self.add_stage(stage)
+                self.totals[stage] += total
+                self.counts[stage] += state["counts"][stage]
+                self.maxima[stage] = max(self.maxima[stage], state["maxima"][stage])
+
+                samples = self.samples[stage]
+                samples.extend(state["samples"][stage][:self.max_samples - len(samples)])
+
+            for name, n in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def stage_summary(self):
+        """Per-stage count, total and mean/percentile/max durations in milliseconds."""
+        summary = {}
+        with self.lock:
+            for stage, count in self.counts.items():
+                if not count:
+                    continue
+                ordered = sorted(self.samples[stage])
+
+                def percentile(q):
+                    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+                summary[stage] = {
+                    "count": count,
+                    "total_s": round(self.totals[stage], 4),
+                    "mean_ms": round(self.totals[stage] / count * 1000, 3),
+                    "p50_ms": round(percentile(0.50), 3),
+                    "p90_ms": round(percentile(0.90), 3),
+                    "p99_ms": round(percentile(0.99), 3),
+                    "max_ms": round(self.maxima[stage] * 1000, 3),
+                }
+        return summary
+
+    def live_summary(self):
+        """Short mean-per-stage line for the status bar, refreshed at most every LIVE_INTERVAL."""
+        now = time.perf_counter()
+        if now - self.live_updated >= LIVE_INTERVAL:
+            parts = [f"{stage} {self.totals[stage] / self.counts[stage] * 1000:.1f}ms"
+                     for stage in self.counts if self.counts[stage]]
+            parts.append(f"skipped {self.counters['skipped']}")
+            self.live_text = ", ".join(parts)
+            self.live_updated = now
+        return self.live_text
+
+    def report(self, **extra):
+        report = dict(extra)
+        report["elapsed_s"] = round(time.perf_counter() - self.started, 3)
+        report["stages"] = self.stage_summary()
+        report["counters"] = dict(self.counters)
+        return report
+
+    def write_report(self, base_path, **extra):
+        """Write <base_path>.json and <base_path>.csv and return both paths."""
+        report = self.report(**extra)
+
+        json_path = base_path + ".json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+        csv_path = base_path + ".csv"
+        columns = ["count", "total_s", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage"] + columns)
+            for stage, values in report["stages"].items():
+                writer.writerow([stage] + [values[column] for column in columns])
+            for name, n in report["counters"].items():
+                writer.writerow([name, n])
+
+        return json_path, csv_path
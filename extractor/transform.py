@@ -0,0 +1,145 @@
+import cv2
+import numpy as np
+
+from .preview import fit_size
+
+# Interpolation names accepted in settings and on the command line
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+
+LETTERBOX_COLOR = 0
+
+
+class FrameTransform:
+    """Crop, grayscale conversion, resize and letterbox applied to frames before encoding.
+
+    The steps run in that order, so each one works on as few pixels as
+    possible: the crop is a view into the decoded frame, grayscale conversion
+    writes into a buffer allocated once, and the resize writes straight into
+    the output buffer (or, with ``letterbox``, into the middle of one whose
+    borders were filled when it was allocated). ``size`` is (width, height),
+    where a 0 keeps the aspect ratio; ``scale`` resizes by a factor instead.
+    ``crop`` is (x, y, width, height) in source pixels.
+
+    Frames handed to a FrameWriterPool stay in use until they are encoded, so
+    outputs rotate through ``reserve(count)`` buffers; reserve at least the
+    writer's max_pending + workers + 1.
+    """
+
+    def __init__(self, size=None, scale=None, interpolation="area", crop=None, grayscale=False, letterbox=False):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        if letterbox and (not size or not all(size)):
+            raise ValueError("Letterbox needs both an output width and height")
+
+        self.size = tuple(size) if size and any(size) else None
+        self.scale = scale if scale and scale != 1 else None
+        self.interpolation = interpolation
+        self.crop = tuple(crop) if crop else None
+        self.grayscale = grayscale
+        self.letterbox = letterbox
+
+        self.buffers = 1
+        self.input_shape = None
+        self.gray = None
+        self.outputs = []
+        self.placement = None  # (x, y, width, height) of the image inside an output buffer
+        self.resizing = False
+        self.next_output = 0
+
+    @property
+    def active(self):
+        return bool(self.size or self.scale or self.crop or self.grayscale)
+
+    def options(self):
+        """Constructor arguments, for rebuilding the transform in a worker process."""
+        return {"size": self.size, "scale": self.scale, "interpolation": self.interpolation,
+                "crop": self.crop, "grayscale": self.grayscale, "letterbox": self.letterbox}
+
+    def reserve(self, count):
+        """Rotate outputs through ``count`` buffers."""
+        self.buffers = max(int(count), 1)
+        self.input_shape = None
+
+    def crop_view(self, frame):
+        if self.crop is None:
+            return frame
+        x, y, width, height = self.crop
+        view = frame[max(y, 0):y + height, max(x, 0):x + width]
+        if view.size == 0:
+            raise ValueError(f"Crop {self.crop} is outside the {frame.shape[1]}x{frame.shape[0]} frame")
+        return view
+
+    def target_size(self, width, height):
+        """Output image size and its placement inside the output buffer."""
+        if self.scale is not None:
+            size = (max(round(width * self.scale), 1), max(round(height * self.scale), 1))
+            return size, (0, 0) + size
+        if self.size is None:
+            return (width, height), (0, 0, width, height)
+
+        target_width, target_height = self.size
+        if self.letterbox:
+            fitted = fit_size(width, height, target_width, target_height)
+            x = (target_width - fitted[0]) // 2
+            y = (target_height - fitted[1]) // 2
+            return self.size, (x, y) + fitted
+        if not target_width:
+            target_width = max(round(width * target_height / height), 1)
+        elif not target_height:
+            target_height = max(round(height * target_width / width), 1)
+        return (target_width, target_height), (0, 0, target_width, target_height)
+
+    def allocate(self, frame):
+        view = self.crop_view(frame)
+        height, width = view.shape[:2]
+        to_gray = self.grayscale and frame.ndim == 3
+        channels = () if self.grayscale or frame.ndim == 2 else frame.shape[2:]
+
+        (out_width, out_height), self.placement = self.target_size(width, height)
+        self.resizing = (out_width, out_height) != (width, height) or self.placement[:2] != (0, 0)
+
+        # Grayscale before resizing leaves a third of the pixels to interpolate
+        self.gray = np.empty((height, width), dtype=np.uint8) if to_gray and self.resizing else None
+
+        self.outputs = []
+        if self.resizing or to_gray:
+            for _ in range(self.buffers):
+                output = np.empty((out_height, out_width) + channels, dtype=np.uint8)
+                output[...] = LETTERBOX_COLOR
+                self.outputs.append(output)
+        self.next_output = 0
+        self.input_shape = frame.shape
+
+    def apply(self, frame):
+        """Return the transformed frame; it lives in a rotating buffer (or is a view of ``frame``)."""
+        if not self.active:
+            return frame
+        if frame.shape != self.input_shape:
+            self.allocate(frame)
+
+        image = self.crop_view(frame)
+        if not self.outputs:
+            # Crop only: a view of the decoded frame, nothing is copied
+            return image
+
+        output = self.outputs[self.next_output]
+        self.next_output = (self.next_output + 1) % len(self.outputs)
+
+        if not self.resizing:
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=output)
+            return output
+
+        if self.gray is not None:
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            image = self.gray
+
+        x, y, width, height = self.placement
+        cv2.resize(image, (width, height), dst=output[y:y + height, x:x + width],
+                   interpolation=INTERPOLATIONS[self.interpolation])
+        return output
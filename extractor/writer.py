@@ -0,0 +1,207 @@
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+
+import cv2
+
+OUTPUT_FORMATS = ("jpg", "png", "webp")
+
+# Encoder options per preset and format; options given explicitly override these.
+# Leaving PNG compression unset keeps OpenCV's own fast default (level 1 with its
+# default filtering), which encodes faster than any level set explicitly, so only
+# "smallest" sets one.
+ENCODER_PRESETS = {
+    "fastest": {
+        "jpg": {"quality": 90},
+        "png": {},
+        "webp": {"quality": 80},
+    },
+    "balanced": {
+        "jpg": {"quality": 95},
+        "png": {},
+        "webp": {"quality": 90},
+    },
+    "smallest": {
+        "jpg": {"quality": 85, "optimize": True, "progressive": True},
+        "png": {"compression": 9},
+        "webp": {"quality": 75},
+    },
+}
+
+
+def default_worker_count():
+    return max(os.cpu_count() or 1, 1)
+
+
+class FrameWriterPool:
+    """Encodes and writes frames on worker threads fed through a bounded queue.
+
+    OpenCV releases the GIL inside imencode, so the workers encode in parallel
+    while the caller keeps decoding. ``submit`` blocks once ``max_pending``
+    frames are waiting, which caps memory at that many decoded frames; the time
+    spent blocked is reported as ``stall_time``. A frame must not be modified
+    after it has been submitted. Encode and write times go to ``timer`` if given.
+    With a ``sink`` (e.g. an ArchiveSink) the encoded images go to its
+    ``write(path, data)`` instead of to files. Frames submitted with a
+    ``record`` are added to ``manifest`` once they are written.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timer=None, sink=None, manifest=None):
+        self.workers = max(int(workers or default_worker_count()), 1)
+        self.timer = timer
+        self.sink = sink
+        self.manifest = manifest
+        self.max_pending = max(int(max_pending or self.workers * 2), 1)
+        self.queue = queue.Queue(maxsize=self.max_pending)
+
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.max_queue_depth = 0
+        self.stall_time = 0.0
+        self.error = None
+        self.lock = threading.Lock()
+
+        self.threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.run_worker, name=f"frame-writer-{i}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(raise_errors=exc_type is None)
+
+    def submit(self, path, frame, params=(), record=None):
+        """Queue a frame to be encoded (format taken from the extension) and written to ``path``."""
+        if self.error is not None:
+            raise self.error
+
+        item = (path, frame, params, record)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait for a worker to free a slot
+            start = time.perf_counter()
+            self.queue.put(item)
+            self.stall_time += time.perf_counter() - start
+
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def run_worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            path, frame, params, record = item
+            manifest = self.manifest if record is not None else None
+            try:
+                size = write_frame(path, frame, params, self.timer, self.sink, manifest, record)
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+                continue
+
+            with self.lock:
+                self.frames_written += 1
+                self.bytes_written += size
+
+    def close(self, raise_errors=True):
+        """Wait for all queued frames to be written and stop the workers."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+        if raise_errors and self.error is not None:
+            raise self.error
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "stall_time": self.stall_time,
+            "frames_written": self.frames_written,
+            "bytes_written": self.bytes_written,
+        }
+
+    def summary(self):
+        return (f"writers: {self.workers}, max queue {self.max_queue_depth}/{self.max_pending}, "
+                f"stalled {self.stall_time:.1f}s")
+
+
+def frame_filename(number, seconds, output_format):
+    """Output file name used by every extraction mode: frame_<number>_<h-mm-ss>.<format>"""
+    timestamp_str = str(timedelta(seconds=int(seconds))).replace(':', '-')
+    return f"frame_{number:04d}_{timestamp_str}.{output_format}"
+
+
+def encoder_params(output_format, preset="balanced", **options):
+    """cv2.imencode parameters for a format from a preset plus explicit options.
+
+    Options are quality, optimize and progressive (JPEG), compression (PNG,
+    0-9) and quality or lossless (WebP); None or options that don't apply to
+    the format are ignored.
+    """
+    if preset not in ENCODER_PRESETS:
+        raise ValueError(f"Unknown encoder preset: {preset}")
+
+    output_format = "jpg" if output_format == "jpeg" else output_format
+    chosen = dict(ENCODER_PRESETS[preset].get(output_format, {}))
+    chosen.update((name, value) for name, value in options.items() if value is not None)
+
+    params = []
+    if output_format == "jpg":
+        params += [cv2.IMWRITE_JPEG_QUALITY, int(chosen.get("quality", 95)),
+                   cv2.IMWRITE_JPEG_OPTIMIZE, int(bool(chosen.get("optimize"))),
+                   cv2.IMWRITE_JPEG_PROGRESSIVE, int(bool(chosen.get("progressive")))]
+    elif output_format == "png":
+        if "compression" in chosen:
+            params += [cv2.IMWRITE_PNG_COMPRESSION, int(chosen["compression"])]
+    elif output_format == "webp":
+        # OpenCV encodes WebP losslessly for any quality above 100
+        quality = 101 if chosen.get("lossless") else int(chosen.get("quality", 90))
+        params += [cv2.IMWRITE_WEBP_QUALITY, quality]
+    return params
+
+
+def write_frame(path, frame, params=(), timer=None, sink=None, manifest=None, record=None):
+    """Encode a frame with cv2.imencode and write it in one buffered write. Returns the byte count.
+
+    The encoded image goes to ``sink.write(path, data)`` instead of a file if a sink is given,
+    and is added to ``manifest`` with ``record`` once written.
+    """
+    if timer is not None:
+        start = time.perf_counter()
+
+    ext = os.path.splitext(path)[1]
+    ok, buffer = cv2.imencode(ext, frame, list(params))
+    if not ok:
+        raise OSError(f"Could not encode frame as {ext}: {path}")
+
+    if timer is not None:
+        encoded = time.perf_counter()
+        timer.add("encode", encoded - start)
+
+    if sink is not None:
+        sink.write(path, buffer)
+    else:
+        with open(path, "wb") as f:
+            f.write(buffer)
+
+    if timer is not None:
+        timer.add("write", time.perf_counter() - encoded)
+
+    if manifest is not None:
+        manifest.add(record, path, buffer)
+    return buffer.nbytes